@@ -1,10 +1,55 @@
-from environ import config, to_config, var
+from attrs import validators
+from environ import config, group, to_config, var
 from nomnom.convention import SystemConfiguration as NomnomSystemConfiguration
 
+from config.database import CONNECTION_MODES
+
+
+def optional_int(value: str | int | None) -> int | None:
+    return None if value in (None, "") else int(value)
+
 
 @config(prefix="NOM")
 class SystemConfiguration(NomnomSystemConfiguration):
+    @config
+    class SENTRY_SDK(NomnomSystemConfiguration.SENTRY_SDK):
+        # the fraction of ordinary requests to trace; admin changes are always
+        # traced, and failed ConTroll logins are unless busy (see config.sentry)
+        traces_sample_rate = var(default=0.05, converter=float)
+        # ...and of static files, health checks and metrics scrapes
+        noise_sample_rate = var(default=0.001, converter=float)
+        # the fraction of traced requests to profile
+        profiles_sample_rate = var(default=0.1, converter=float)
+        # transactions per second, per worker, past which we trace less
+        busy_rate = var(default=20, converter=int)
+
+    sentry_sdk = group(SENTRY_SDK)
+
+    @config
+    class DB(NomnomSystemConfiguration.DB):
+        # how workers hold their connections; see config.database
+        connections = var(
+            default="pgbouncer", validator=validators.in_(CONNECTION_MODES)
+        )
+        # in "pool" mode, the connections all the web workers hold between them;
+        # pgbouncer's default_pool_size is 60, and celery needs some too
+        pool_connections = var(default=40, converter=int)
+        # prepare statements server-side after this many runs; unset, they never are
+        prepare_threshold = var(default=None, converter=optional_int)
+
+    db = group(DB)
+
+    # granian's worker count, as start.sh sets it
+    web_concurrency = var(default=2, converter=int, name="WEB_CONCURRENCY")
+
     controll_jwt_key = var()
 
+    # Where sessions live: "db", or in the Redis cache alone ("cache"), or in
+    # the cache in front of the database ("cached_db"). See the
+    # `migrate_sessions` command for moving between them.
+    session_engine = var(
+        default="db", validator=validators.in_(["db", "cache", "cached_db"])
+    )
+
 
 system_configuration = to_config(SystemConfiguration)
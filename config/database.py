@@ -0,0 +1,59 @@
+"""How each worker holds its database connections.
+
+`NOM_DB_CONNECTIONS` picks one of:
+
+- `pgbouncer` (the default): a new connection for each request, closed at the
+  end of it. Connecting to pgbouncer is cheap, and in `pool_mode = transaction`
+  it's pgbouncer that shares out the server connections.
+- `persistent`: each thread keeps its connection for up to ten minutes,
+  checking it's still alive before each request. Only use this under WSGI or
+  in development: under ASGI every request runs its ORM calls in a thread of
+  its own, so these are rarely reused, and each idle one holds a server
+  connection until it ages out.
+- `pool`: each worker keeps a psycopg connection pool, sized so that all of
+  the `WEB_CONCURRENCY` workers together hold at most
+  `NOM_DB_POOL_CONNECTIONS`. Connections are borrowed for a request and given
+  back at the end of it; the pool checks them when they come back, so there's
+  no health check round trip per request. This needs `psycopg_pool` (the
+  `pool` extra).
+
+Django turns psycopg's server-side prepared statements off, which is what
+pgbouncer in transaction mode needs. Setting `NOM_DB_PREPARE_THRESHOLD`
+turns them back on, with server-side parameter binding, preparing a query
+once it has run that many times on a connection; only do that when talking
+straight to Postgres, or to a pgbouncer (1.21 or later) that has
+`max_prepared_statements` set.
+"""
+
+from typing import Any
+
+CONNECTION_MODES = ("pgbouncer", "persistent", "pool")
+
+# the fewest connections a worker's pool keeps open, and the fewest it can grow to
+MIN_POOL_SIZE = 2
+
+
+def pool_size(budget: int, workers: int) -> tuple[int, int]:
+    """The (min_size, max_size) of one worker's pool."""
+    max_size = max(MIN_POOL_SIZE, budget // max(workers, 1))
+    return MIN_POOL_SIZE, max_size
+
+
+def connection_settings(db, *, web_concurrency: int, debug: bool) -> dict[str, Any]:
+    """The keys of `DATABASES["default"]` that depend on the connection mode."""
+    keys: dict[str, Any] = {}
+    driver: dict[str, Any] = {}
+
+    if db.prepare_threshold is not None:
+        driver["server_side_binding"] = True
+        driver["prepare_threshold"] = db.prepare_threshold
+
+    if db.connections == "persistent" and not debug:
+        keys["CONN_MAX_AGE"] = 600
+        keys["CONN_HEALTH_CHECKS"] = True
+    elif db.connections == "pool":
+        min_size, max_size = pool_size(db.pool_connections, web_concurrency)
+        driver["pool"] = {"min_size": min_size, "max_size": max_size}
+
+    keys["OPTIONS"] = driver
+    return keys
@@ -0,0 +1,145 @@
+"""How much of the site's traffic we trace in Sentry.
+
+Tracing every request is fine on a quiet day, but during nominations and
+voting it means shipping (and profiling) every login and every static file.
+Instead, we trace a configurable fraction of ordinary requests, and back that
+off further when a worker is busy. A few requests are worth seeing more of:
+
+- ConTroll logins that fail. A login can't know at the start whether it will
+  fail, so logins are traced in full while a worker is quiet, and the
+  successful ones are thinned out when they finish. Profiling is the costly
+  part, and it has to be decided at the start, so logins are only profiled at
+  the rate an ordinary route would be, and a profiled login is always kept.
+  A busy worker (say, during a login storm) backs off logins like everything
+  else, so that it isn't tracing every one of them when it can least afford
+  to; every login's outcome is still tagged and counted (see `metrics`).
+- Anything that changes data in the admin, which is always traced.
+
+Static files, health checks and metrics scrapes get a much smaller rate.
+"""
+
+import random
+import threading
+import time
+from collections.abc import Callable
+
+# the tag `controll_redirect` puts on its transaction, with the login's outcome
+CONTROLL_OUTCOME_TAG = "controll.outcome"
+
+CONTROLL_LOGIN_PATHS = ("/controll-redirect/", "/convention/controll-redirect/")
+NOISE_PATH_PREFIXES = ("/static/", "/watchman/", "/_metrics/", "/favicon.ico")
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class LoadMeter:
+    """How many transactions this worker has started in the last second or so."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._second = 0
+        self._current = 0
+        self._previous = 0
+
+    def _roll(self) -> None:
+        second = int(self._clock())
+        if second != self._second:
+            self._previous = self._current if second == self._second + 1 else 0
+            self._current = 0
+            self._second = second
+
+    def tick(self) -> None:
+        with self._lock:
+            self._roll()
+            self._current += 1
+
+    def rate(self) -> int:
+        with self._lock:
+            self._roll()
+            return max(self._current, self._previous)
+
+
+class Sampler:
+    def __init__(
+        self,
+        *,
+        traces_rate: float,
+        noise_rate: float,
+        profiles_rate: float,
+        busy_rate: int,
+        load: LoadMeter | None = None,
+        rand: Callable[[], float] = random.random,
+    ):
+        self.traces_rate = traces_rate
+        self.noise_rate = noise_rate
+        self.profiles_rate = profiles_rate
+        self.busy_rate = busy_rate
+        self.load = load or LoadMeter()
+        self._random = rand
+
+    def _load_factor(self) -> float:
+        # past `busy_rate` transactions a second, trace proportionally less,
+        # so that a busy worker sends about as much as one at `busy_rate`.
+        rate = self.load.rate()
+        if self.busy_rate <= 0 or rate <= self.busy_rate:
+            return 1.0
+        return self.busy_rate / rate
+
+    def traces_sampler(self, sampling_context: dict) -> float:
+        self.load.tick()
+        method, path = _request_line(sampling_context)
+
+        if path in CONTROLL_LOGIN_PATHS:
+            # successful ones are thinned in `before_send_transaction`, once
+            # we know how it went; see `profiles_sampler` for what that costs
+            return self._load_factor()
+
+        if path.startswith("/admin/") and method not in SAFE_METHODS:
+            return 1.0
+
+        if (parent_sampled := sampling_context.get("parent_sampled")) is not None:
+            return float(parent_sampled)
+
+        if path.startswith(NOISE_PATH_PREFIXES):
+            return self.noise_rate * self._load_factor()
+
+        return self.traces_rate * self._load_factor()
+
+    def profiles_sampler(self, sampling_context: dict) -> float:
+        """The fraction of traced transactions to profile.
+
+        Most traced logins are only traced in case they fail, and are thrown
+        away when they don't, so profiling them as well would mostly be wasted.
+        Instead they're profiled as if they had been traced at `traces_rate`,
+        and `before_send_transaction` keeps every one that was.
+        """
+        _, path = _request_line(sampling_context)
+        if path in CONTROLL_LOGIN_PATHS:
+            return self.profiles_rate * self.traces_rate
+
+        return self.profiles_rate
+
+    def before_send_transaction(self, event: dict, hint: dict) -> dict | None:
+        outcome = (event.get("tags") or {}).get(CONTROLL_OUTCOME_TAG)
+        if outcome is None or outcome == "rejected":
+            return event
+
+        # we've already paid for the profile
+        if event.get("profile") is not None:
+            return event
+
+        # the load was already accounted for when the login was sampled
+        if self._random() < self.traces_rate:
+            return event
+
+        return None
+
+
+def _request_line(sampling_context: dict) -> tuple[str, str]:
+    if (scope := sampling_context.get("asgi_scope")) is not None:
+        return scope.get("method", ""), scope.get("path", "")
+
+    if (environ := sampling_context.get("wsgi_environ")) is not None:
+        return environ.get("REQUEST_METHOD", ""), environ.get("PATH_INFO", "")
+
+    return "", ""
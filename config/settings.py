@@ -21,6 +21,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # import the system configuration from the application
 from config import system_configuration as cfg
+from config.database import connection_settings
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
@@ -68,10 +69,6 @@ INSTALLED_APPS = [
     # deferred tasks
     "django_celery_results",
     "django_celery_beat",
-    # debug helper
-    "django_extensions",
-    "django_browser_reload",
-    "debug_toolbar",
     # to render markdown to HTML in templates
     "markdownify.apps.MarkdownifyConfig",
     # OAuth login
@@ -120,7 +117,6 @@ AUTHENTICATION_BACKENDS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -128,7 +124,6 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "django_browser_reload.middleware.BrowserReloadMiddleware",
     "social_django.middleware.SocialAuthExceptionMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
     "nomnom.middleware.HtmxMessageMiddleware",
@@ -140,6 +135,9 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [],
+        # Django's default loaders compile each template once per worker;
+        # `config.warmup` fills that cache in for the busiest pages as the
+        # worker starts.
         "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
@@ -149,8 +147,8 @@ TEMPLATES = [
                 "django.contrib.messages.context_processors.messages",
                 "social_django.context_processors.backends",
                 "social_django.context_processors.login_redirect",
-                "nomnom.nominate.context_processors.site",
-                "nomnom.nominate.context_processors.inject_login_form",
+                "seattle_2025_app.context_processors.site",
+                "seattle_2025_app.context_processors.inject_login_form",
             ],
             "string_if_invalid": InvalidStringShowWarning("%s"),
         },
@@ -172,14 +170,11 @@ DATABASES = {
         "HOST": cfg.db.host,
         "PORT": str(cfg.db.port),
         "DISABLE_SERVER_SIDE_CURSORS": True,
+        # persistent connections, a connection per request, or a pool per worker
+        **connection_settings(cfg.db, web_concurrency=cfg.web_concurrency, debug=DEBUG),
     }
 }
 
-# reuse some of those DB connections
-if not DEBUG:
-    CONN_HEALTH_CHECKS = True
-    CONN_MAX_AGE = 600
-
 HUGOPACKET_AWS_REGION = "sfo3"
 HUGOPACKET_AWS_USE_CDN = True
 
@@ -190,6 +185,9 @@ CACHES = {
     },
 }
 
+SESSION_ENGINE = f"django.contrib.sessions.backends.{cfg.session_engine}"
+SESSION_CACHE_ALIAS = "default"
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -262,6 +260,25 @@ USE_X_FORWARDED_PORT = True
 STATIC_URL = "static/"
 STATIC_ROOT = cfg.static_file_root
 
+# Outside DEBUG, `collectstatic` writes a hashed copy of every file, with gzip
+# and brotli variants alongside, and whitenoise serves the
+# hashed names with a far-future, immutable Cache-Control. See `caddy_static`
+# to have Caddy serve them instead.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        if DEBUG
+        else "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
+
+# A reference to a file that's in STATIC_ROOT but missing from the manifest
+# gets its hash worked out on the spot, instead of failing the page with a 500.
+WHITENOISE_MANIFEST_STRICT = False
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -374,15 +391,23 @@ if cfg.sentry_sdk.dsn is not None:
     # settings.py
     import sentry_sdk
 
+    from config.sentry import Sampler
+
+    sampler = Sampler(
+        traces_rate=cfg.sentry_sdk.traces_sample_rate,
+        noise_rate=cfg.sentry_sdk.noise_sample_rate,
+        profiles_rate=cfg.sentry_sdk.profiles_sample_rate,
+        busy_rate=cfg.sentry_sdk.busy_rate,
+    )
+
     sentry_sdk.init(
         dsn=cfg.sentry_sdk.dsn,
-        # Set traces_sample_rate to 1.0 to capture 100%
-        # of transactions for performance monitoring.
-        traces_sample_rate=1.0,
-        # Set profiles_sample_rate to 1.0 to profile 100%
-        # of sampled transactions.
-        # We recommend adjusting this value in production.
-        profiles_sample_rate=1.0,
+        # Which transactions we trace depends on the route and on how busy we
+        # are; see config.sentry.
+        traces_sampler=sampler.traces_sampler,
+        before_send_transaction=sampler.before_send_transaction,
+        # The fraction of traced transactions to profile; fewer for logins.
+        profiles_sampler=sampler.profiles_sampler,
         # Our environment
         environment=cfg.sentry_sdk.environment,
         # include the user and client IP
@@ -401,6 +426,21 @@ if cfg.debug:
         "127.0.0.1",
     ]
 
+    # debug helpers; production doesn't even import these.
+    INSTALLED_APPS += [
+        "django_extensions",
+        "django_browser_reload",
+        "debug_toolbar",
+    ]
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.middleware.security.SecurityMiddleware") + 1,
+        "debug_toolbar.middleware.DebugToolbarMiddleware",
+    )
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.middleware.clickjacking.XFrameOptionsMiddleware") + 1,
+        "django_browser_reload.middleware.BrowserReloadMiddleware",
+    )
+
 # Seed data can come from here:
 FIXTURE_DIRS = [BASE_DIR / "seed"]
 
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import attrs
+import pytest
+from django.db import connections
+
+from config import SystemConfiguration
+from config.database import connection_settings, pool_size
+
+
+def db(connections, prepare_threshold=None, pool_connections=40):
+    return SimpleNamespace(
+        connections=connections,
+        prepare_threshold=prepare_threshold,
+        pool_connections=pool_connections,
+    )
+
+
+@pytest.mark.parametrize(
+    "budget, workers, expected", [(40, 2, (2, 20)), (40, 3, (2, 13)), (4, 8, (2, 2))]
+)
+def test_pool_size(budget, workers, expected):
+    assert pool_size(budget, workers) == expected
+
+
+def test_by_default_nothing_persists():
+    # under ASGI each request's ORM calls run in a thread of their own, so a
+    # connection kept open for the thread is never reused
+    default = attrs.fields(SystemConfiguration.DB).connections.default
+    keys = connection_settings(db(default), web_concurrency=2, debug=False)
+
+    assert default == "pgbouncer"
+    assert "CONN_MAX_AGE" not in keys
+    assert connections["default"].settings_dict["CONN_MAX_AGE"] == 0
+
+
+def test_persistent():
+    keys = connection_settings(db("persistent"), web_concurrency=2, debug=False)
+
+    assert keys == {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True, "OPTIONS": {}}
+
+
+def test_nothing_persists_in_debug():
+    keys = connection_settings(db("persistent"), web_concurrency=2, debug=True)
+
+    assert "CONN_MAX_AGE" not in keys
+
+
+def test_pgbouncer():
+    keys = connection_settings(db("pgbouncer"), web_concurrency=2, debug=False)
+
+    assert keys == {"OPTIONS": {}}
+
+
+def test_pool_is_shared_out_between_workers():
+    keys = connection_settings(
+        db("pool", pool_connections=30), web_concurrency=3, debug=False
+    )
+
+    assert keys["OPTIONS"]["pool"] == {"min_size": 2, "max_size": 10}
+    # Django refuses to pool persistent connections
+    assert "CONN_MAX_AGE" not in keys
+
+
+def test_prepared_statements_need_server_side_binding():
+    keys = connection_settings(
+        db("pgbouncer", prepare_threshold=5), web_concurrency=2, debug=False
+    )
+
+    assert keys["OPTIONS"] == {"server_side_binding": True, "prepare_threshold": 5}
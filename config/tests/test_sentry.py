@@ -0,0 +1,103 @@
+from config.sentry import LoadMeter, Sampler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def request(method, path):
+    return {"asgi_scope": {"type": "http", "method": method, "path": path}}
+
+
+def make_sampler(clock=None, rand=lambda: 0.5, busy_rate=20):
+    return Sampler(
+        traces_rate=0.1,
+        noise_rate=0.001,
+        profiles_rate=0.5,
+        busy_rate=busy_rate,
+        load=LoadMeter(clock or Clock()),
+        rand=rand,
+    )
+
+
+def test_routes():
+    sampler = make_sampler()
+
+    assert sampler.traces_sampler(request("GET", "/e/")) == 0.1
+    assert sampler.traces_sampler(request("GET", "/static/css/site.css")) == 0.001
+    assert sampler.traces_sampler(request("GET", "/watchman/")) == 0.001
+    assert sampler.traces_sampler(request("GET", "/admin/")) == 0.1
+    assert sampler.traces_sampler(request("POST", "/admin/auth/user/1/change/")) == 1
+    assert sampler.traces_sampler(request("GET", "/controll-redirect/")) == 1
+
+
+def test_parent_decision_is_followed():
+    sampler = make_sampler()
+
+    context = request("GET", "/e/") | {"parent_sampled": True}
+    assert sampler.traces_sampler(context) == 1
+
+
+def test_busy_workers_trace_less():
+    clock = Clock()
+    sampler = make_sampler(clock, busy_rate=20)
+
+    for _ in range(39):
+        sampler.traces_sampler(request("GET", "/e/"))
+
+    assert sampler.traces_sampler(request("GET", "/e/")) == 0.1 * 20 / 40
+
+    # the last second still counts, and then it's quiet again
+    clock.now += 1
+    assert sampler.traces_sampler(request("GET", "/e/")) == 0.1 * 20 / 40
+    clock.now += 5
+    assert sampler.traces_sampler(request("GET", "/e/")) == 0.1
+
+
+def test_logins_back_off_when_busy():
+    clock = Clock()
+    sampler = make_sampler(clock, busy_rate=20)
+
+    assert sampler.traces_sampler(request("GET", "/controll-redirect/")) == 1
+
+    for _ in range(38):
+        sampler.traces_sampler(request("GET", "/controll-redirect/"))
+
+    assert sampler.traces_sampler(request("GET", "/controll-redirect/")) == 20 / 40
+
+
+def test_failed_logins_are_always_sent():
+    sampler = make_sampler(rand=lambda: 0.99)
+
+    rejected = {"tags": {"controll.outcome": "rejected"}}
+    returning = {"tags": {"controll.outcome": "returning"}}
+    other = {"tags": {}}
+
+    assert sampler.before_send_transaction(rejected, {}) is rejected
+    assert sampler.before_send_transaction(returning, {}) is None
+    assert sampler.before_send_transaction(other, {}) is other
+
+
+def test_successful_logins_are_sent_at_the_traces_rate():
+    sampler = make_sampler(rand=lambda: 0.05)
+
+    returning = {"tags": {"controll.outcome": "returning"}}
+    assert sampler.before_send_transaction(returning, {}) is returning
+
+
+def test_logins_are_profiled_at_the_traces_rate():
+    sampler = make_sampler()
+
+    assert sampler.profiles_sampler(request("GET", "/e/")) == 0.5
+    assert sampler.profiles_sampler(request("GET", "/controll-redirect/")) == 0.5 * 0.1
+
+
+def test_profiled_logins_are_always_sent():
+    sampler = make_sampler(rand=lambda: 0.99)
+
+    profiled = {"tags": {"controll.outcome": "returning"}, "profile": object()}
+    assert sampler.before_send_transaction(profiled, {}) is profiled
@@ -0,0 +1,46 @@
+import logging
+
+from django.template import TemplateSyntaxError
+
+from config import warmup
+
+
+def test_warm_templates_follows_extends_and_includes():
+    compiled = warmup.warm_templates(["registration/controll_login_failed.html"])
+
+    assert "registration/controll_login_failed.html" in compiled
+    assert "base.html" in compiled
+
+
+def test_missing_templates_are_skipped():
+    compiled = warmup.warm_templates(["bits/no-such-template.html", "base.html"])
+
+    assert "bits/no-such-template.html" not in compiled
+    assert "base.html" in compiled
+
+
+def test_warm_up_never_stops_a_worker(monkeypatch, caplog):
+    def broken():
+        raise RuntimeError("no database today")
+
+    monkeypatch.setattr(warmup, "warm_urls", broken)
+
+    assert warmup.warm_up() is None
+    assert "Couldn't warm up this worker" in caplog.text
+
+
+def test_a_broken_template_is_logged_and_skipped(monkeypatch, caplog):
+    caplog.set_level(logging.INFO, logger=warmup.__name__)
+    get_template = warmup.get_template
+
+    def broken(name):
+        if name == "bits/login_forms.html":
+            raise TemplateSyntaxError("Invalid block tag on line 1")
+        return get_template(name)
+
+    monkeypatch.setattr(warmup, "get_template", broken)
+
+    warmup.warm_up()
+
+    assert "Couldn't compile 'bits/login_forms.html'" in caplog.text
+    assert "Warmed up the URLconf" in caplog.text
@@ -17,31 +17,37 @@ Including another URLconf
 
 import djp
 import nomnom.base.views
-from debug_toolbar.toolbar import debug_toolbar_urls
+from django.apps import apps
 from django.contrib import admin
 from django.urls import include, path
 from django_svcs.apps import svcs_from
 from nomnom.convention import ConventionConfiguration
 
+from seattle_2025_app.views import login_metrics
+
 convention_configuration = svcs_from().get(ConventionConfiguration)
 
-urlpatterns = (
-    [
-        path("", nomnom.base.views.index, name="index"),
-        path("e/", include("nomnom.nominate.urls", namespace="election")),
-        path("e/", include("nomnom.canonicalize.urls", namespace="canonicalize")),
-        path("convention/", include("seattle_2025_app.urls", namespace="convention")),
-        path("admin/action-forms/", include("django_admin_action_forms.urls")),
-        path("admin/", admin.site.urls),
-        path("", include("social_django.urls", namespace="social")),
-        path("accounts/", include("django.contrib.auth.urls")),
-        path("watchman/", include("watchman.urls")),
-        path("__reload__/", include("django_browser_reload.urls")),
-        path("", include("seattle_2025_app.urls", namespace="seattle_2025_app")),
-    ]
-    + debug_toolbar_urls()
-    + djp.urlpatterns()
-)
+urlpatterns = [
+    path("", nomnom.base.views.index, name="index"),
+    path("e/", include("nomnom.nominate.urls", namespace="election")),
+    path("e/", include("nomnom.canonicalize.urls", namespace="canonicalize")),
+    path("convention/", include("seattle_2025_app.urls", namespace="convention")),
+    path("admin/action-forms/", include("django_admin_action_forms.urls")),
+    path("admin/", admin.site.urls),
+    path("", include("social_django.urls", namespace="social")),
+    path("accounts/", include("django.contrib.auth.urls")),
+    path("watchman/", include("watchman.urls")),
+    path("_metrics/logins", login_metrics, name="login-metrics"),
+    path("", include("seattle_2025_app.urls", namespace="seattle_2025_app")),
+] + djp.urlpatterns()
+
+if apps.is_installed("django_browser_reload"):
+    urlpatterns.append(path("__reload__/", include("django_browser_reload.urls")))
+
+if apps.is_installed("debug_toolbar"):
+    from debug_toolbar.toolbar import debug_toolbar_urls
+
+    urlpatterns += debug_toolbar_urls()
 
 if convention_configuration.hugo_packet_backend is not None:
     urlpatterns.append(
@@ -0,0 +1,104 @@
+"""Get a freshly started web worker ready before its first request.
+
+granian recycles each worker every `WEB_WORKER_TIMEOUT` seconds. Without this,
+the first few requests a new worker serves pay for importing every URLconf and
+view, and for finding and compiling the templates they render. `warm_up` does
+that as the worker boots instead: it resolves the URLconf (which imports the
+views), and compiles the templates on the busiest pages, along with the ones
+they extend and include, into the cached template loader.
+
+Nothing here is allowed to stop a worker from starting; anything that goes
+wrong is logged and skipped, and the request that needs it pays as before.
+"""
+
+import logging
+import time
+from collections.abc import Iterable
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.base import Template
+from django.template.loader import get_template
+from django.template.loader_tags import ExtendsNode, IncludeNode
+from django.urls import get_resolver, reverse
+
+logger = logging.getLogger(__name__)
+
+HOT_TEMPLATES = (
+    "nomnom/index.html",
+    "nominate/nominate.html",
+    "nominate/vote.html",
+    "registration/controll_login_failed.html",
+    "bits/convention_header.html",
+    "bits/site-header.html",
+    "bits/login_forms.html",
+)
+
+
+def _referenced_templates(template: Template) -> Iterable[str]:
+    """The templates this one extends or includes by name."""
+    for node_type, attribute in (
+        (ExtendsNode, "parent_name"),
+        (IncludeNode, "template"),
+    ):
+        for node in template.nodelist.get_nodes_by_type(node_type):
+            expression = getattr(node, attribute)
+            if isinstance(expression.var, str) and not expression.filters:
+                yield expression.var
+
+
+def warm_templates(names: Iterable[str] = HOT_TEMPLATES) -> list[str]:
+    """Compile the named templates and everything they reference.
+
+    Returns the names of the templates that were compiled.
+    """
+    pending = list(names)
+    seen: set[str] = set()
+    compiled: list[str] = []
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+
+        try:
+            template = get_template(name).template
+        except TemplateDoesNotExist:
+            logger.warning(f"Can't warm up {name!r}; there's no such template")
+            continue
+        except Exception:
+            logger.exception(f"Couldn't compile {name!r}")
+            continue
+
+        compiled.append(name)
+        pending.extend(_referenced_templates(template))
+
+    return sorted(compiled)
+
+
+def warm_urls() -> None:
+    """Import every URLconf and view, and build the reverse lookup tables."""
+    # reversing anything populates the resolver, importing every URLconf
+    reverse("index")
+    resolver = get_resolver()
+    for status_code in (400, 403, 404, 500):
+        resolver.resolve_error_handler(status_code)
+
+
+def warm_up() -> None:
+    if settings.DEBUG:
+        # the reloader restarts us often enough that it isn't worth it
+        return
+
+    start = time.perf_counter()
+    try:
+        warm_urls()
+        templates = warm_templates()
+    except Exception:
+        logger.exception("Couldn't warm up this worker")
+        return
+
+    logger.info(
+        f"Warmed up the URLconf and {len(templates)} templates"
+        f" in {time.perf_counter() - start:.2f}s"
+    )
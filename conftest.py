@@ -45,9 +45,27 @@ def use_test_settings(settings):
 
     settings.WHITENOISE_AUTOREFRESH = True
 
+    # keep cached state from leaking between tests, and off the dev redis.
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": str(uuid.uuid4()),
+        }
+    }
+
     settings.CONTROLL_JWT_KEY = str(uuid.uuid4())
 
 
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    from seattle_2025_app import metrics, replay
+    from seattle_2025_app.auth import clear_wsfs_group_cache
+
+    clear_wsfs_group_cache()
+    replay.clear_local()
+    metrics.reset_store()
+
+
 @pytest.fixture
 def user_factory():
     from django.contrib.auth import get_user_model
@@ -70,8 +88,10 @@ def user_factory():
 def controll_person_factory():
     from seattle_2025_app.models import ControllPerson
 
-    def create_controll_person(user, perid=None, newperid=None):
-        return ControllPerson.objects.create(user=user, perid=perid, newperid=newperid)
+    def create_controll_person(user, perid=None, newperid=None, **kwargs):
+        return ControllPerson.objects.create(
+            user=user, perid=perid, newperid=newperid, **kwargs
+        )
 
     return create_controll_person
 
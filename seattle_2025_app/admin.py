@@ -16,7 +16,7 @@ class ControllPersonInline(admin.StackedInline):
     def has_delete_permission(self, request, obj=None):
         return False
 
-    readonly_fields = ["perid", "newperid"]
+    readonly_fields = ["perid", "newperid", "applied_rights"]
 
 
 CustomUserAdmin.inlines.append(ControllPersonInline)
@@ -0,0 +1,20 @@
+from django.apps import AppConfig
+
+
+class ConventionAppConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "seattle_2025_app"
+
+    def ready(self) -> None:
+        self.enable_signals()
+        self.enable_query_counter()
+
+        return super().ready()
+
+    def enable_signals(self):
+        from . import signals  # noqa: F401
+
+    def enable_query_counter(self):
+        from . import metrics
+
+        metrics.install_query_counter()
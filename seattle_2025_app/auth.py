@@ -1,18 +1,25 @@
-from typing import cast
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Literal, cast
 
 import jwt
 import sentry_sdk
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import BaseBackend
 from django.contrib.auth.models import AbstractUser, Group
-from django.db import transaction
-from django.db.models import ObjectDoesNotExist
+from django.db import connections, transaction
+from django.db.models import ObjectDoesNotExist, Q
+from django.db.models.signals import m2m_changed
 from django.http import HttpRequest
 from django_svcs.apps import svcs_from
 from nomnom.convention import ConventionConfiguration
 from nomnom.nominate import models as nominate
 
+from seattle_2025_app import identity, metrics, user_cache
 from seattle_2025_app.models import ControllPerson
 
 
@@ -27,22 +34,144 @@ def create_username(perid: str | None, newperid: str | None) -> str:
     return f"controll.{perid}.{newperid}"
 
 
+@dataclass(frozen=True)
+class ControllToken:
+    """A ConTroll login token whose signature we have already checked.
+
+    The expiry is recorded rather than enforced, because the two things we do
+    with a token treat it differently: a returning member may log in with an
+    expired link, but we only create a member from one that is still valid.
+    """
+
+    claims: dict[str, Any]
+    expired: bool
+
+    @property
+    def perid(self):
+        return self.claims.get("perid")
+
+    @property
+    def newperid(self):
+        return self.claims.get("newperid")
+
+    @property
+    def rights(self) -> list[str]:
+        return (self.claims.get("rights") or "").split(",")
+
+
+# The ConTroll rights that we map onto convention groups.
+WSFS_RIGHTS = frozenset({"hugo_nominate", "hugo_vote"})
+
+
+def canonical_rights(rights: list[str]) -> str:
+    """The WSFS rights in a claim, in a stable form we can compare."""
+    return ",".join(sorted(WSFS_RIGHTS.intersection(rights)))
+
+
+def decode_token(token: str) -> ControllToken | None:
+    """Verify a raw ConTroll JWT, once.
+
+    Returns None if the token isn't one ConTroll signed for us.
+    """
+    try:
+        claims = jwt.decode(
+            token,
+            settings.CONTROLL_JWT_KEY,
+            algorithms=["HS256", "HS512"],
+            options={"verify_exp": False},
+        )
+    except jwt.InvalidTokenError as e:
+        sentry_sdk.capture_exception(e)
+        return None
+
+    return ControllToken(claims=claims, expired=is_expired(claims))
+
+
+def is_expired(claims: dict[str, Any]) -> bool:
+    """Would PyJWT have rejected these claims for their expiry?
+
+    This mirrors `verify_exp`, including treating a malformed `exp` as unusable.
+    """
+    if "exp" not in claims:
+        return False
+
+    try:
+        exp = int(claims["exp"])
+    except (ValueError, TypeError, OverflowError):
+        return True
+
+    return exp <= datetime.now(timezone.utc).timestamp()
+
+
+def find_controll_person(
+    perid, newperid
+) -> tuple[ControllPerson | None, Literal["perid", "newperid"] | None]:
+    """Find the person a token belongs to, and which of its IDs matched.
+
+    Both IDs are looked up at once, along with the user and their convention
+    profile; a perid match wins over a newperid one. Both columns are unique, so
+    there are at most two rows to choose from.
+    """
+    if (candidates := _controll_person_candidates(perid, newperid)) is None:
+        return None, None
+
+    return _match_controll_person(list(candidates), perid, newperid)
+
+
+async def afind_controll_person(
+    perid, newperid
+) -> tuple[ControllPerson | None, Literal["perid", "newperid"] | None]:
+    """See find_controll_person()."""
+    if (candidates := _controll_person_candidates(perid, newperid)) is None:
+        return None, None
+
+    return _match_controll_person(
+        [person async for person in candidates], perid, newperid
+    )
+
+
+def _controll_person_candidates(perid, newperid):
+    if perid and newperid:
+        lookup = Q(perid=perid) | Q(newperid=newperid)
+    elif perid:
+        lookup = Q(perid=perid)
+    elif newperid:
+        lookup = Q(newperid=newperid)
+    else:
+        return None
+
+    return ControllPerson.objects.filter(lookup).select_related(
+        "user", "user__convention_profile"
+    )
+
+
+def _match_controll_person(
+    candidates: list[ControllPerson], perid, newperid
+) -> tuple[ControllPerson | None, Literal["perid", "newperid"] | None]:
+    # ConTroll sends IDs as strings or numbers, depending on its mood.
+    for person in candidates:
+        if perid and str(person.perid) == str(perid):
+            return person, "perid"
+
+    for person in candidates:
+        if newperid and str(person.newperid) == str(newperid):
+            return person, "newperid"
+
+    return None, None
+
+
 class ControllBackend(BaseBackend):
-    def authenticate(self, request, token=None, **kwargs) -> AbstractUser | None:
+    def authenticate(
+        self, request, token: str | ControllToken | None = None, **kwargs
+    ) -> AbstractUser | None:
         if token is None:
-            return
-
-        try:
-            token = jwt.decode(
-                token,
-                settings.CONTROLL_JWT_KEY,
-                algorithms=["HS256", "HS512"],
-                options={"verify_exp": False},
-            )
-        except jwt.InvalidTokenError as e:
-            sentry_sdk.capture_exception(e)
             return None
 
+        if not isinstance(token, ControllToken):
+            token = decode_token(token)
+            if token is None:
+                return None
+
         # Algorithm for authentication:
         #
         # if given perid…
@@ -70,70 +199,155 @@ class ControllBackend(BaseBackend):
         #       return id
         #       exit
 
-        perid = token.get("perid")
-        newperid = token.get("newperid")
-        rights = token.get("rights", "").split(",")
-        if perid:
-            matches = ControllPerson.objects.filter(perid=perid)
-            if matched_person := matches.first():
-                # update permissions for the user.
-                user = matched_person.user
-                changed = update_wsfs_permissions(request, rights, user)
-                if changed:
-                    user.save()
+        perid = token.perid
+        newperid = token.newperid
+        rights = token.rights
+
+        # most logins are members we've seen recently.
+        if (known := identity.lookup(perid, newperid)) is not None:
+            if (user := self.get_user(known.user_id)) is not None:
+                applied = apply_wsfs_rights(
+                    request, user, known.person_id, known.applied_rights, rights
+                )
+                if applied != known.applied_rights:
+                    identity.remember(replace(known, applied_rights=applied))
                 return user
 
-            if newperid:
-                matches = ControllPerson.objects.filter(newperid=newperid)
-                if matched_person := matches.first():
-                    matched_person.perid = perid
-                    matched_person.save()
-
-                    # we also need to update the member number.
-                    try:
-                        convention_profile = matched_person.user.convention_profile
-                        convention_profile.member_number = perid
-                        convention_profile.save()
-
-                    except ObjectDoesNotExist:
-                        pass
-
-                    return matched_person.user
-
-            # we don't perform creation in this, just lookups. We only save the perid
-            # for faster searches later.
-
-        elif newperid:
-            matches = ControllPerson.objects.filter(newperid=newperid)
-            if matched_person := matches.first():
-                user = matched_person.user
-                changed = update_wsfs_permissions(request, rights, user)
-                if changed:
-                    user.save()
+            identity.forget(perid, newperid)
+
+        matched_person, matched_by = find_controll_person(perid, newperid)
+        if matched_person is None:
+            # we don't perform creation in this, just lookups.
+            return None
+
+        user = matched_person.user
+
+        if matched_by == "newperid" and perid:
+            upgrade_perid(matched_person, perid)
+            return user
+
+        # update permissions for the user.
+        matched_person.applied_rights = apply_wsfs_rights(
+            request, user, matched_person.pk, matched_person.applied_rights, rights
+        )
+        identity.remember(matched_person)
+
+        return user
+
+    async def aauthenticate(
+        self, request, token: str | ControllToken | None = None, **kwargs
+    ) -> AbstractUser | None:
+        """See authenticate().
+
+        Lookups go through the async ORM and cache; the writes, when there are
+        any, each run as one short transaction in a worker thread.
+        """
+        if token is None:
+            return None
+
+        if not isinstance(token, ControllToken):
+            token = decode_token(token)
+            if token is None:
+                return None
+
+        perid = token.perid
+        newperid = token.newperid
+        rights = token.rights
+
+        if (known := await identity.alookup(perid, newperid)) is not None:
+            if (user := await self.aget_user(known.user_id)) is not None:
+                applied = await aapply_wsfs_rights(
+                    request, user, known.person_id, known.applied_rights, rights
+                )
+                if applied != known.applied_rights:
+                    await identity.aremember(replace(known, applied_rights=applied))
                 return user
 
-        return None
+            await identity.aforget(perid, newperid)
+
+        matched_person, matched_by = await afind_controll_person(perid, newperid)
+        if matched_person is None:
+            return None
+
+        user = matched_person.user
+
+        if matched_by == "newperid" and perid:
+            await sync_to_async(upgrade_perid)(matched_person, perid)
+            return user
+
+        matched_person.applied_rights = await aapply_wsfs_rights(
+            request, user, matched_person.pk, matched_person.applied_rights, rights
+        )
+        await identity.aremember(matched_person)
+
+        return user
 
     def get_user(self, user_id):
-        UserModel = get_user_model()
+        # This runs for every request a member makes, so their user, profile
+        # and groups come from `user_cache` when they can.
+        if (user := user_cache.get(user_id)) is not None:
+            return user
+
         try:
-            return UserModel.objects.get(pk=user_id)
-        except UserModel.DoesNotExist:
+            user = _users_with_profile_and_groups().get(pk=user_id)
+        except get_user_model().DoesNotExist:
             return None
 
+        user_cache.remember(user)
+        return user
+
+    async def aget_user(self, user_id):
+        if (user := await user_cache.aget(user_id)) is not None:
+            return user
+
+        try:
+            user = await _users_with_profile_and_groups().aget(pk=user_id)
+        except get_user_model().DoesNotExist:
+            return None
+
+        await user_cache.aremember(user)
+        return user
+
+
+def _users_with_profile_and_groups():
+    return (
+        get_user_model()
+        .objects.select_related("convention_profile")
+        .prefetch_related("groups")
+    )
+
 
 @transaction.atomic
+def upgrade_perid(person: ControllPerson, perid) -> None:
+    """Record the perid of a person we had only known by their newperid."""
+    metrics.note_outcome("upgraded")
+
+    # We only save the perid for faster searches later.
+    person.perid = perid
+    person.save(update_fields=["perid"])
+    transaction.on_commit(partial(identity.remember, person))
+
+    # we also need to update the member number.
+    try:
+        convention_profile = person.user.convention_profile
+        convention_profile.member_number = perid
+        convention_profile.save(update_fields=["member_number", "updated_at"])
+    except ObjectDoesNotExist:
+        pass
+
+
 def create_member(
-    request, token: dict[str, str]
+    request, token: ControllToken
 ) -> nominate.NominatingMemberProfile | None:
+    claims = token.claims
     try:
-        perid = token["perid"]
-        newperid = token["newperid"]
-        email = token["email"]
-        first_name = token["first_name"]
-        last_name = token["last_name"]
-        full_name = token["fullName"]
-        rights = token["rights"].split(",")
+        perid = claims["perid"]
+        newperid = claims["newperid"]
+        email = claims["email"]
+        first_name = claims["first_name"]
+        last_name = claims["last_name"]
+        full_name = claims["fullName"]
+        rights = claims["rights"].split(",")
     except KeyError:
         # the token was incomplete; we can't create a user.
         return None
@@ -142,91 +356,290 @@ def create_member(
         # we can't create a user without a perid or a newperid
         return None
 
+    member = provision_member(
+        request,
+        perid=perid,
+        newperid=newperid,
+        email=email,
+        first_name=first_name,
+        last_name=last_name,
+        full_name=full_name,
+        rights=rights,
+    )
+
+    sentry_sdk.set_user(user_info_from_user(member.user))
+
+    return member
+
+
+@transaction.atomic
+def provision_member(
+    request,
+    *,
+    perid,
+    newperid,
+    email: str,
+    first_name: str,
+    last_name: str,
+    full_name: str,
+    rights: list[str],
+) -> nominate.NominatingMemberProfile:
+    """Write the rows that make up a member, in one transaction.
+
+    Two tabs (or two workers) can be creating the same member at once, so each
+    row is an upsert rather than a read followed by an insert: whichever request
+    gets there second finds the first one's rows and carries on. Rows that
+    already exist are left as they were, and what we return is read back from
+    the database, not built from the token.
+    """
     UserModel = get_user_model()
 
     member_number = perid if perid else newperid
 
-    user, created = UserModel.objects.get_or_create(
-        username=create_username(perid, newperid),
-        defaults=dict(
-            email=email,
-            first_name=first_name,
-            last_name=last_name,
-        ),
+    # "Updating" a unique column to its own value is how we get Postgres to
+    # return the id of the row that was already there.
+    (user,) = UserModel.objects.bulk_create(
+        [
+            UserModel(
+                username=create_username(perid, newperid),
+                email=email,
+                first_name=first_name,
+                last_name=last_name,
+            )
+        ],
+        update_conflicts=True,
+        unique_fields=["username"],
+        update_fields=["username"],
     )
 
-    # I know this will always be so, but the type checker doesn't.
-    user = cast(AbstractUser, user)
+    # The user, perid and newperid are each unique; with no conflict target,
+    # a clash on any of them leaves the row that was there first. Nothing has
+    # been applied to a new person yet, so the sync below always runs for them.
+    ControllPerson.objects.bulk_create(
+        [ControllPerson(perid=perid, newperid=newperid, user_id=user.pk)],
+        ignore_conflicts=True,
+    )
+    # someone who beat us to it may have had their person cached already.
+    transaction.on_commit(partial(identity.forget, perid, newperid))
 
-    sentry_sdk.set_user(user_info_from_user(user))
+    person, _ = find_controll_person(perid, newperid)
+    if person is None:
+        # the user already had a person, known by other IDs
+        person = ControllPerson.objects.select_related(
+            "user", "user__convention_profile"
+        ).get(user_id=user.pk)
 
-    # is the user complete? We need a ControllPerson and NominatingMemberProfile
-    # even if we didn't create the user.
-    missing_controll_person = False
-    missing_convention_profile = False
-    if not created:
-        try:
-            user.controll_person  # type: ignore[reportAttributeAccessIssue]
-        except ObjectDoesNotExist:
-            missing_controll_person = True
+    # the stored user, not the one we built: the session keeps a hash of its
+    # password, and its flags and names are what everything else should see.
+    user = cast(AbstractUser, person.user)
 
-        try:
-            user.convention_profile  # type: ignore[reportAttributeAccessIssue]
-        except ObjectDoesNotExist:
-            missing_convention_profile = True
-
-    if created or missing_controll_person:
-        ControllPerson.objects.create(
-            perid=perid,
-            newperid=newperid,
-            user=user,
-        )
-
-    if created or missing_convention_profile:
-        member = nominate.NominatingMemberProfile.objects.create(
-            user=user,
-            preferred_name=full_name,
-            member_number=member_number,
-        )
-    else:
+    try:
         member = user.convention_profile  # type: ignore[reportAttributeAccessIssue]
+    except ObjectDoesNotExist:
+        (member,) = nominate.NominatingMemberProfile.objects.bulk_create(
+            [
+                nominate.NominatingMemberProfile(
+                    user=user,
+                    preferred_name=full_name,
+                    member_number=member_number,
+                )
+            ],
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["user"],
+        )
 
     # now we check for the rights, and assign the member to the right groups.
-    changed = update_wsfs_permissions(request, rights, user)
-
-    if changed:
-        user.save()
+    apply_wsfs_rights(request, user, person.pk, person.applied_rights, rights)
 
     return member
 
 
+def apply_wsfs_rights(
+    request: HttpRequest | None,
+    user: AbstractUser,
+    person_id: int,
+    applied_rights: str | None,
+    rights: list[str],
+) -> str:
+    """Sync the user's groups to their rights, unless we already have.
+
+    The rights claim rarely changes between logins, so each ControllPerson
+    records the rights we last applied; when the claim matches, the groups
+    are left alone without even being read.
+
+    Returns the rights now applied.
+    """
+    wsfs_rights = canonical_rights(rights)
+    if wsfs_rights == applied_rights:
+        return wsfs_rights
+
+    sync_wsfs_rights(request, user, person_id, rights)
+    return wsfs_rights
+
+
+async def aapply_wsfs_rights(
+    request: HttpRequest | None,
+    user: AbstractUser,
+    person_id: int,
+    applied_rights: str | None,
+    rights: list[str],
+) -> str:
+    """See apply_wsfs_rights()."""
+    wsfs_rights = canonical_rights(rights)
+    if wsfs_rights == applied_rights:
+        return wsfs_rights
+
+    await sync_to_async(sync_wsfs_rights)(request, user, person_id, rights)
+    return wsfs_rights
+
+
+def sync_wsfs_rights(
+    request: HttpRequest | None, user: AbstractUser, person_id: int, rights: list[str]
+) -> None:
+    # This doesn't need a transaction of its own: the groups are written
+    # (atomically) before the record of what was applied, so if we fail in
+    # between, the next login just syncs again.
+    update_wsfs_permissions(request, rights, user)
+    ControllPerson.objects.filter(pk=person_id).update(
+        applied_rights=canonical_rights(rights)
+    )
+
+
 def update_wsfs_permissions(
-    request: HttpRequest, rights: list[str], user: AbstractUser
+    request: HttpRequest | None, rights: list[str], user: AbstractUser
 ) -> bool:
-    changed = False
+    """Bring the user's WSFS groups in line with their ConTroll rights.
+
+    The user's current memberships are read in one query, and only the
+    difference is written: at most one insert and one delete. Nothing on the
+    user row changes, so there's nothing for the caller to save.
 
+    Returns whether any membership changed.
+    """
     convention = svcs_from(request).get(ConventionConfiguration)
 
-    groups = Group.objects.filter(
-        name__in=[convention.nominating_group, convention.voting_group]
+    groups_by_right = wsfs_groups(convention)
+
+    managed = {group.pk for group in groups_by_right.values()}
+    wanted = {group.pk for right, group in groups_by_right.items() if right in rights}
+
+    UserGroups = type(user).groups.through
+    current = set(
+        UserGroups.objects.filter(user_id=user.pk, group_id__in=managed).values_list(
+            "group_id", flat=True
+        )
     )
-    groups_by_name = {group.name: group for group in groups}
-    groups_by_right: dict[str, Group] = {
+
+    to_add = wanted - current
+    to_remove = current - wanted
+
+    if not (to_add or to_remove):
+        return False
+
+    with transaction.atomic(savepoint=False):
+        if to_add:
+            with _group_membership_signals(user, "add", to_add) as added:
+                added.update(_insert_memberships(user, to_add))
+
+        if to_remove:
+            with _group_membership_signals(user, "remove", to_remove) as removed:
+                UserGroups.objects.filter(
+                    user_id=user.pk, group_id__in=to_remove
+                ).delete()
+                removed.update(to_remove)
+
+    # `user.groups.all()` would otherwise go on answering from a prefetch (ours,
+    # or the one `user_cache` restores) taken before the change.
+    groups_field = type(user).groups.field
+    getattr(user, "_prefetched_objects_cache", {}).pop(groups_field.name, None)
+
+    return True
+
+
+def _insert_memberships(user: AbstractUser, group_ids: set[int]) -> set[int]:
+    """Add the user to the groups they aren't in yet, in one insert.
+
+    A concurrent login may have added some of them already; returns the ones
+    that this added.
+    """
+    groups_field = type(user).groups.field
+    UserGroups = type(user).groups.through
+    connection = connections[UserGroups.objects.db]
+    qn = connection.ops.quote_name
+    user_column = qn(groups_field.m2m_column_name())
+    group_column = qn(groups_field.m2m_reverse_name())
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {qn(UserGroups._meta.db_table)} ({user_column}, {group_column})"
+            f" SELECT %s, unnest(%s::bigint[])"
+            f" ON CONFLICT DO NOTHING RETURNING {group_column}",
+            [user.pk, sorted(group_ids)],
+        )
+        return {group_id for (group_id,) in cursor.fetchall()}
+
+
+@contextmanager
+def _group_membership_signals(user: AbstractUser, action: str, pk_set: set[int]):
+    """Send the m2m_changed signals that `user.groups.add/remove` would.
+
+    We write the membership rows directly, but NomNom relies on these signals,
+    for instance to invalidate nominations when someone loses nominating rights.
+    The caller adds the groups it actually changed to the set this yields, and
+    only those are sent with the `post_` signal.
+    """
+    UserGroups = type(user).groups.through
+    signal_kwargs = dict(
+        sender=UserGroups,
+        instance=user,
+        reverse=False,
+        model=Group,
+        pk_set=pk_set,
+        using=UserGroups.objects.db,
+        # lets our own receivers tell this apart from a change made by hand.
+        wsfs_sync=True,
+    )
+    m2m_changed.send(action=f"pre_{action}", **signal_kwargs)
+    changed: set[int] = set()
+    yield changed
+    if changed:
+        m2m_changed.send(action=f"post_{action}", **signal_kwargs | {"pk_set": changed})
+
+
+# The convention's nominating and voting groups, keyed by the group names in
+# the ConventionConfiguration. They're needed on every login and almost never
+# change, so each worker keeps them; `signals` drops them when a Group changes
+# in this process, and worker recycling takes care of the others.
+_wsfs_groups: dict[tuple[str, str], dict[str, Group]] = {}
+_wsfs_groups_generation = 0
+
+
+def wsfs_groups(convention: ConventionConfiguration) -> dict[str, Group]:
+    """Map the ConTroll rights to the groups that grant them."""
+    key = (convention.nominating_group, convention.voting_group)
+    if (groups_by_right := _wsfs_groups.get(key)) is not None:
+        return groups_by_right
+
+    generation = _wsfs_groups_generation
+    groups_by_name = {group.name: group for group in Group.objects.filter(name__in=key)}
+    groups_by_right = {
         "hugo_nominate": groups_by_name[convention.nominating_group],
         "hugo_vote": groups_by_name[convention.voting_group],
     }
 
-    user_group_names = user.groups.values_list("name", flat=True)
+    # if the groups changed while we were reading them, don't keep what we read.
+    if generation == _wsfs_groups_generation:
+        _wsfs_groups[key] = groups_by_right
+
+    return groups_by_right
+
 
-    for right, group in groups_by_right.items():
-        if right in rights and group.name not in user_group_names:
-            user.groups.add(group)
-            changed = changed or True
-        elif right not in rights and group.name in user_group_names:
-            user.groups.remove(group)
-            changed = changed or True
+def clear_wsfs_group_cache() -> None:
+    global _wsfs_groups_generation
 
-    return changed
+    _wsfs_groups_generation += 1
+    _wsfs_groups.clear()
 
 
 def user_info_from_user(user: AbstractUser):
@@ -0,0 +1,214 @@
+"""Shared plumbing for the load benchmarks in `seattle_2025_app.management.commands`.
+
+Nothing in the running site imports this module; it exists so that each
+benchmark command measures things the same way and reports them in the same
+shape.
+"""
+
+import asyncio
+import math
+import time
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
+
+import jwt
+from django.conf import settings
+
+from seattle_2025_app import metrics
+
+DEFAULT_RIGHTS = "hugo_nominate,hugo_vote"
+
+
+def mint_token(
+    perid: int | str | None,
+    newperid: int | str | None,
+    *,
+    first_name: str,
+    last_name: str,
+    email: str,
+    rights: str = DEFAULT_RIGHTS,
+    days: int = 1,
+    key: str | None = None,
+) -> str:
+    """Mint a ConTroll login token.
+
+    The payload is the same shape that `bin/login-link` produces, which is
+    in turn the shape that ConTroll sends us.
+    """
+    user_record = {
+        "exp": (datetime.now(timezone.utc) + timedelta(days=days)).timestamp(),
+        "email": email,
+        "perid": perid,
+        "newperid": newperid,
+        "legalName": None,
+        "first_name": first_name,
+        "last_name": last_name,
+        "fullName": f"{first_name} {last_name}",
+        "resType": "fullRights",
+        "rights": rights,
+    }
+
+    if key is None:
+        key = settings.CONTROLL_JWT_KEY
+
+    return jwt.encode(user_record, key, algorithm="HS512")
+
+
+@dataclass
+class Sample:
+    """One measured request."""
+
+    scenario: str
+    status: int = 0
+    elapsed: float = 0.0
+    queries: int = 0
+    db_time: float = 0.0
+
+
+async def asgi_get(
+    application,
+    path: str,
+    query: dict[str, str],
+    *,
+    host: str,
+    headers: Sequence[tuple[bytes, bytes]] = (),
+) -> int:
+    """Issue a single GET against an ASGI application and return the status."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "https",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(query).encode(),
+        "root_path": "",
+        "headers": [(b"host", host.encode()), *headers],
+        "client": ("127.0.0.1", 0),
+        "server": (host, 443),
+    }
+
+    status = 0
+    request_sent = False
+    response_done = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # like a real server, hold the connection open until we're done
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get(
+            "more_body", False
+        ):
+            response_done.set()
+
+    try:
+        await application(scope, receive, send)
+    finally:
+        response_done.set()
+
+    return status
+
+
+async def replay(
+    application,
+    requests: Sequence[tuple[str, str, dict[str, str]]],
+    *,
+    concurrency: int,
+    host: str,
+    headers: Sequence[tuple[bytes, bytes]] = (),
+) -> tuple[list[Sample], float]:
+    """Replay (scenario, path, query) requests with at most `concurrency` in flight.
+
+    Returns the samples and the wall-clock duration of the whole run.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(scenario: str, path: str, query: dict[str, str]) -> Sample:
+        async with semaphore:
+            sample = Sample(scenario=scenario)
+            start = time.perf_counter()
+            with metrics.count_queries() as queries:
+                try:
+                    sample.status = await asgi_get(
+                        application, path, query, host=host, headers=headers
+                    )
+                finally:
+                    sample.elapsed = time.perf_counter() - start
+            sample.queries = queries.queries
+            sample.db_time = queries.db_time
+            return sample
+
+    start = time.perf_counter()
+    samples = await asyncio.gather(*(one(*request) for request in requests))
+    return list(samples), time.perf_counter() - start
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile; good enough for latency reporting."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+@dataclass
+class Summary:
+    label: str
+    count: int
+    statuses: dict[int, int] = field(default_factory=dict)
+    p50_ms: float = 0.0
+    p95_ms: float = 0.0
+    p99_ms: float = 0.0
+    throughput: float = 0.0
+    queries_per_request: float = 0.0
+    db_ms_per_request: float = 0.0
+
+    def as_row(self) -> str:
+        statuses = " ".join(f"{k}:{v}" for k, v in sorted(self.statuses.items()))
+        return (
+            f"{self.label:<12} {self.count:>7} {self.p50_ms:>9.1f} {self.p95_ms:>9.1f}"
+            f" {self.p99_ms:>9.1f} {self.throughput:>9.1f} {self.queries_per_request:>8.2f}"
+            f" {self.db_ms_per_request:>8.2f}  {statuses}"
+        )
+
+
+SUMMARY_HEADER = (
+    f"{'scenario':<12} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    f" {'req/s':>9} {'queries':>8} {'db ms':>8}  statuses"
+)
+
+
+def summarize(label: str, samples: Iterable[Sample], duration: float) -> Summary:
+    samples = list(samples)
+    latencies = [s.elapsed * 1000 for s in samples]
+    statuses: dict[int, int] = {}
+    for sample in samples:
+        statuses[sample.status] = statuses.get(sample.status, 0) + 1
+
+    count = len(samples)
+    return Summary(
+        label=label,
+        count=count,
+        statuses=statuses,
+        p50_ms=percentile(latencies, 50),
+        p95_ms=percentile(latencies, 95),
+        p99_ms=percentile(latencies, 99),
+        throughput=count / duration if duration else 0.0,
+        queries_per_request=sum(s.queries for s in samples) / count if count else 0.0,
+        db_ms_per_request=sum(s.db_time for s in samples) * 1000 / count
+        if count
+        else 0.0,
+    )
@@ -0,0 +1,58 @@
+"""Lazy versions of nomnom's `site` and `inject_login_form` context processors.
+
+Every template rendered with a request runs the context processors, whether
+or not it uses what they provide: the ballot pages build a login form they
+never show, and HTMX partials look up the admin message and the logo's static
+URL only to throw them away. These give templates the same names, but the
+expensive values are zero-argument callables, which the template language
+calls (once per request) when a template actually uses them.
+
+Python code that reads these values out of a context, rather than a template,
+has to call them itself.
+"""
+
+import platform
+from functools import cache
+from typing import Any
+
+import django
+from django.conf import settings
+from django.contrib.auth.forms import AuthenticationForm
+from django.http import HttpRequest
+from django_svcs.apps import svcs_from
+from nomnom.convention import ConventionConfiguration
+from nomnom.nominate import models
+from nomnom.nominate.context_processors import url_or_static
+
+
+def _admin_message() -> str | None:
+    admin_message = models.AdminMessage.objects.filter(active=True).first()
+    return admin_message.message if admin_message is not None else None
+
+
+def site(request: HttpRequest) -> dict[str, Any]:
+    convention = svcs_from(request).get(ConventionConfiguration)
+
+    # each `cache()` here is a fresh memo, so they're only shared within the request
+    return {
+        "DJANGO_VERSION": ".".join(str(i) for i in django.VERSION[:2]),
+        "PYTHON_VERSION": platform.python_version(),
+        "USERNAME_LOGIN": settings.NOMNOM_ALLOW_USERNAME_LOGIN_FOR_MEMBERS,
+        "HUGO_HELP_EMAIL": convention.get_hugo_help_email(request),
+        "REGISTRATION_EMAIL": convention.get_registration_email(request),
+        "CONVENTION_NAME": convention.name,
+        "CONVENTION_SUBTITLE": convention.subtitle,
+        "CONVENTION_SLUG": convention.slug,
+        "CONVENTION_SITE_URL": convention.site_url,
+        "CONVENTION_LOGO_ALT_TEXT": convention.logo_alt_text,
+        "CONVENTION_LOGO": cache(lambda: url_or_static(convention.logo)),
+        "ADVISORY_VOTES": convention.advisory_votes_enabled,
+        "ADMIN_MESSAGE": cache(_admin_message),
+    }
+
+
+def inject_login_form(request: HttpRequest) -> dict[str, Any]:
+    if settings.NOMNOM_ALLOW_USERNAME_LOGIN_FOR_MEMBERS:
+        return {"form": cache(AuthenticationForm)}
+    else:
+        return {}
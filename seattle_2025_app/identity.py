@@ -0,0 +1,160 @@
+"""A short-lived cache of who a ConTroll perid or newperid belongs to.
+
+Members click their ConTroll link over and over while nominating and voting
+are open; this lets those repeat logins skip the ControllPerson lookup. The
+entries are dropped whenever a ControllPerson is saved or deleted (see
+`signals`), and expire on their own shortly after.
+"""
+
+import threading
+from dataclasses import dataclass
+
+import redis
+import sentry_sdk
+from django.core.cache import cache
+
+from seattle_2025_app.models import ControllPerson
+
+IDENTITY_TIMEOUT = 5 * 60
+
+
+class CacheStats:
+    """Hit and miss counts for one of our caches, for this worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+stats = CacheStats()
+
+
+@dataclass(frozen=True)
+class KnownPerson:
+    """What a returning login needs to know about a ControllPerson."""
+
+    person_id: int
+    user_id: int
+    perid: int | None
+    newperid: int | None
+    applied_rights: str | None
+
+    @classmethod
+    def from_person(cls, person: ControllPerson) -> "KnownPerson":
+        return cls(
+            person_id=person.pk,
+            user_id=person.user_id,
+            perid=person.perid,
+            newperid=person.newperid,
+            applied_rights=person.applied_rights,
+        )
+
+
+def _key(kind: str, value) -> str:
+    return f"controll-person:{kind}:{value}"
+
+
+def _keys(perid, newperid) -> list[str]:
+    keys = []
+    if perid:
+        keys.append(_key("perid", perid))
+    if newperid:
+        keys.append(_key("newperid", newperid))
+    return keys
+
+
+def lookup(perid, newperid) -> KnownPerson | None:
+    """The person these ConTroll IDs resolve to, if we know it.
+
+    A token with a perid is only ever answered from the perid: if we don't know
+    the perid yet, the person may need it filled in, and that has to go to the
+    database.
+    """
+    if not (perid or newperid):
+        return None
+
+    try:
+        known = cache.get(_lookup_key(perid, newperid))
+    except redis.RedisError as e:
+        # the cache is an optimisation; never fail a login because of it.
+        sentry_sdk.capture_exception(e)
+        known = None
+
+    return _counted(known)
+
+
+async def alookup(perid, newperid) -> KnownPerson | None:
+    """See lookup()."""
+    if not (perid or newperid):
+        return None
+
+    try:
+        known = await cache.aget(_lookup_key(perid, newperid))
+    except redis.RedisError as e:
+        sentry_sdk.capture_exception(e)
+        known = None
+
+    return _counted(known)
+
+
+def _lookup_key(perid, newperid) -> str:
+    return _key("perid", perid) if perid else _key("newperid", newperid)
+
+
+def _counted(known: KnownPerson | None) -> KnownPerson | None:
+    if known is None:
+        stats.miss()
+    else:
+        stats.hit()
+    return known
+
+
+def _entries(person: ControllPerson | KnownPerson) -> dict[str, KnownPerson]:
+    if isinstance(person, ControllPerson):
+        person = KnownPerson.from_person(person)
+    return {key: person for key in _keys(person.perid, person.newperid)}
+
+
+def remember(person: ControllPerson | KnownPerson) -> None:
+    try:
+        cache.set_many(_entries(person), IDENTITY_TIMEOUT)
+    except redis.RedisError as e:
+        sentry_sdk.capture_exception(e)
+
+
+async def aremember(person: ControllPerson | KnownPerson) -> None:
+    try:
+        await cache.aset_many(_entries(person), IDENTITY_TIMEOUT)
+    except redis.RedisError as e:
+        sentry_sdk.capture_exception(e)
+
+
+def forget(perid, newperid) -> None:
+    if not (keys := _keys(perid, newperid)):
+        return
+    try:
+        cache.delete_many(keys)
+    except redis.RedisError as e:
+        sentry_sdk.capture_exception(e)
+
+
+async def aforget(perid, newperid) -> None:
+    if not (keys := _keys(perid, newperid)):
+        return
+    try:
+        await cache.adelete_many(keys)
+    except redis.RedisError as e:
+        sentry_sdk.capture_exception(e)
@@ -0,0 +1,84 @@
+"""Compare the database connection modes under a login storm.
+
+The connection mode is fixed when the settings are loaded, so for each mode
+`bench_login_storm` is run in a process of its own, with `NOM_DB_CONNECTIONS`
+set, and the overall summaries are reported side by side. Everything else,
+including `WEB_CONCURRENCY` (which sizes the pool), comes from the environment
+of this command. Like `bench_login_storm`, don't point it at production.
+"""
+
+import dataclasses
+import json
+import os
+import subprocess
+import sys
+
+import djclick as click
+from django.conf import settings
+
+from config import system_configuration
+from config.database import CONNECTION_MODES
+from seattle_2025_app import benchmark
+
+
+def run_storm(mode: str, storm_args: list[str]) -> benchmark.Summary:
+    env = os.environ.copy()
+    env["NOM_DB_CONNECTIONS"] = mode
+    result = subprocess.run(
+        [sys.executable, "manage.py", "bench_login_storm", "--json", *storm_args],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise click.ClickException(
+            f"bench_login_storm failed with {mode} connections:\n{result.stderr}"
+        )
+
+    overall = json.loads(result.stdout)["summaries"][0]
+    overall["label"] = mode
+    overall["statuses"] = {int(k): v for k, v in overall["statuses"].items()}
+    return benchmark.Summary(**overall)
+
+
+@click.command()
+@click.option("--requests", "total", default=1000, show_default=True)
+@click.option("--concurrency", default=50, show_default=True)
+@click.option(
+    "--modes",
+    default=",".join(CONNECTION_MODES),
+    show_default=True,
+    help="The connection modes to compare.",
+)
+@click.option("--seed", default=2025, show_default=True)
+@click.option("--json", "as_json", is_flag=True, help="Emit the summary as JSON.")
+def main(total, concurrency, modes, seed, as_json):
+    """Run the same login storm under each connection mode."""
+    storm_args = [
+        f"--requests={total}",
+        f"--concurrency={concurrency}",
+        f"--seed={seed}",
+    ]
+    summaries = [run_storm(mode, storm_args) for mode in modes.split(",")]
+
+    if as_json:
+        click.echo(
+            json.dumps(
+                {
+                    "requests": total,
+                    "concurrency": concurrency,
+                    "summaries": [dataclasses.asdict(s) for s in summaries],
+                },
+                indent=2,
+            )
+        )
+        return
+
+    click.echo(
+        f"{total} logins per connection mode, at concurrency {concurrency},"
+        f" with WEB_CONCURRENCY={system_configuration.web_concurrency}"
+    )
+    click.echo(benchmark.SUMMARY_HEADER)
+    for summary in summaries:
+        click.echo(summary.as_row())
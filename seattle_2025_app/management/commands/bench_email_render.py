@@ -0,0 +1,137 @@
+"""Compare rendering the nominations email with and without `cached_markdown`.
+
+The shipped `nominate/email/nominations_for_user` templates are rendered for a
+made-up member, once as they are and once with the upstream `markdownify` and
+`nomnom_filters` libraries loaded in place of `cached_markdown`. Nothing is
+written to the database.
+"""
+
+import dataclasses
+import json
+import time
+
+import djclick as click
+from django.template import engines
+from django.template.loader import get_template
+from nomnom.nominate.models import (
+    Category,
+    Election,
+    NominatingMemberProfile,
+    Nomination,
+)
+
+from seattle_2025_app import benchmark
+from seattle_2025_app.templatetags import cached_markdown
+
+TEMPLATES = (
+    "nominate/email/nominations_for_user.txt",
+    "nominate/email/nominations_for_user.html",
+)
+UPSTREAM_LOAD = "{% load markdownify nomnom_filters %}"
+
+
+def sample_context(election_id: str | None, categories: int) -> dict:
+    if election_id is not None:
+        election = Election.objects.get(slug=election_id)
+        category_list = list(Category.objects.filter(election=election))
+    else:
+        election = Election(slug="bench", name="Benchmark Hugo Awards")
+        category_list = [
+            Category(
+                election=election,
+                name=f"Best *Category* Number {n} ~~or so~~",
+                ballot_position=n,
+                fields=2,
+                field_1_description="Title",
+                field_2_description="Author",
+            )
+            for n in range(categories)
+        ]
+
+    return {
+        "report_date": "today",
+        "member": NominatingMemberProfile(preferred_name="Benchmark Member"),
+        "election": election,
+        "nominations": [
+            (
+                category,
+                [
+                    Nomination(
+                        category=category, field_1=f"Work {n}", field_2="Someone"
+                    )
+                    for n in range(5)
+                ],
+            )
+            for category in category_list
+        ],
+        "ballot_url": "https://example.com/",
+        "message": None,
+    }
+
+
+def upstream_templates():
+    engine = engines["django"]
+    templates = []
+    for name in TEMPLATES:
+        source = get_template(name).template.source
+        templates.append(
+            engine.from_string(
+                source.replace("{% load cached_markdown %}", UPSTREAM_LOAD)
+            )
+        )
+    return templates
+
+
+def measure(label, templates, context, emails) -> benchmark.Summary:
+    samples = []
+    start = time.perf_counter()
+    for _ in range(emails):
+        sample = benchmark.Sample(scenario=label, status=200)
+        begin = time.perf_counter()
+        for template in templates:
+            template.render(context)
+        sample.elapsed = time.perf_counter() - begin
+        samples.append(sample)
+    return benchmark.summarize(label, samples, time.perf_counter() - start)
+
+
+@click.command()
+@click.option("--emails", default=500, show_default=True)
+@click.option(
+    "--election",
+    "election_id",
+    default=None,
+    help="Use this election's categories, instead of made-up ones.",
+)
+@click.option("--categories", default=20, show_default=True)
+@click.option("--json", "as_json", is_flag=True, help="Emit the summary as JSON.")
+def main(emails, election_id, categories, as_json):
+    """Render the nominations email EMAILS times, before and after."""
+    context = sample_context(election_id, categories)
+
+    cached_markdown.clear()
+    summaries = [
+        measure("upstream", upstream_templates(), context, emails),
+        measure("cached", [get_template(name) for name in TEMPLATES], context, emails),
+    ]
+
+    if as_json:
+        click.echo(
+            json.dumps(
+                {
+                    "emails": emails,
+                    "categories": len(context["nominations"]),
+                    "summaries": [dataclasses.asdict(s) for s in summaries],
+                },
+                indent=2,
+            )
+        )
+        return
+
+    click.echo(
+        f"{emails} nominations emails (text and HTML) with"
+        f" {len(context['nominations'])} categories each"
+    )
+    click.echo(benchmark.SUMMARY_HEADER)
+    for summary in summaries:
+        click.echo(summary.as_row())
@@ -0,0 +1,239 @@
+"""Replay a storm of ConTroll logins against the ASGI application.
+
+This writes members into whatever database the settings point at, in a
+reserved perid range, and removes them again when it's done (unless you
+ask it to `--keep` them). Don't point it at production.
+"""
+
+import asyncio
+import dataclasses
+import json
+import random
+
+import djclick as click
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models import Q
+from django_svcs.apps import svcs_from
+from nomnom.convention import ConventionConfiguration
+from nomnom.nominate.models import NominatingMemberProfile
+
+from seattle_2025_app import benchmark
+from seattle_2025_app.auth import create_username
+from seattle_2025_app.models import ControllPerson
+
+# Benchmark members live far above any real ConTroll perid so that we can
+# find and remove them without touching anybody else.
+BENCH_ID_BASE = 900_000_000
+
+SCENARIOS = ("perid", "newperid", "upgrade", "new")
+
+RIGHTS_CHOICES = ("hugo_nominate,hugo_vote", "hugo_nominate", "hugo_vote", "")
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise click.BadParameter(f"unknown scenario {name!r}; use {SCENARIOS}")
+        weights[name] = float(weight)
+    return weights
+
+
+def bench_members():
+    UserModel = get_user_model()
+    return UserModel.objects.filter(
+        Q(controll_person__perid__gte=BENCH_ID_BASE)
+        | Q(controll_person__newperid__gte=BENCH_ID_BASE)
+    )
+
+
+def provision(
+    identities: list[tuple[int | None, int | None]], groups: list[Group]
+) -> None:
+    """Create already-known members for the returning-login scenarios."""
+    UserModel = get_user_model()
+    with transaction.atomic():
+        users = UserModel.objects.bulk_create(
+            [
+                UserModel(
+                    username=create_username(
+                        str(perid) if perid else None,
+                        str(newperid) if newperid else None,
+                    ),
+                    email=f"bench.{perid or newperid}@example.com",
+                    first_name="Bench",
+                    last_name=str(perid or newperid),
+                )
+                for perid, newperid in identities
+            ]
+        )
+        ControllPerson.objects.bulk_create(
+            [
+                ControllPerson(
+                    user=user,
+                    perid=perid,
+                    newperid=newperid,
+                    applied_rights=benchmark.DEFAULT_RIGHTS,
+                )
+                for user, (perid, newperid) in zip(users, identities)
+            ]
+        )
+        NominatingMemberProfile.objects.bulk_create(
+            [
+                NominatingMemberProfile(
+                    user=user,
+                    preferred_name=f"Bench {user.last_name}",
+                    member_number=str(perid or newperid),
+                )
+                for user, (perid, newperid) in zip(users, identities)
+            ]
+        )
+        UserGroups = UserModel.groups.through
+        UserGroups.objects.bulk_create(
+            [
+                UserGroups(user_id=user.pk, group_id=group.pk)
+                for user in users
+                for group in groups
+            ]
+        )
+
+
+def token_for(perid: int | None, newperid: int | None, rights: str) -> dict[str, str]:
+    ident = perid or newperid
+    return {
+        "r": benchmark.mint_token(
+            perid,
+            newperid,
+            first_name="Bench",
+            last_name=str(ident),
+            email=f"bench.{ident}@example.com",
+            rights=rights,
+        )
+    }
+
+
+@click.command()
+@click.option("--requests", "total", default=1000, show_default=True)
+@click.option("--concurrency", default=50, show_default=True)
+@click.option(
+    "--mix",
+    default="perid=70,newperid=10,upgrade=10,new=10",
+    show_default=True,
+    help="Relative weights of the login scenarios.",
+)
+@click.option(
+    "--population",
+    default=500,
+    show_default=True,
+    help="Returning members to provision for each of the perid/newperid scenarios.",
+)
+@click.option(
+    "--rights-churn",
+    default=0.1,
+    show_default=True,
+    help="Fraction of returning logins whose rights differ from what they hold.",
+)
+@click.option("--host", default="localhost", show_default=True)
+@click.option("--seed", default=2025, show_default=True)
+@click.option("--keep", is_flag=True, help="Leave the benchmark members in place.")
+@click.option("--json", "as_json", is_flag=True, help="Emit the summary as JSON.")
+def main(total, concurrency, mix, population, rights_churn, host, seed, keep, as_json):
+    """Measure `controll_redirect` under a login storm.
+
+    Tokens are minted the same way `bin/login-link` mints them and replayed
+    through `config.asgi:application`, covering returning members matched by
+    perid or newperid, members whose perid is being filled in, and members
+    logging in for the first time.
+    """
+    weights = parse_mix(mix)
+    rng = random.Random(seed)
+
+    convention = svcs_from().get(ConventionConfiguration)
+    groups = list(
+        Group.objects.filter(
+            name__in=[convention.nominating_group, convention.voting_group]
+        )
+    )
+
+    bench_members().delete()
+
+    next_id = iter(range(BENCH_ID_BASE, BENCH_ID_BASE + 100_000_000))
+    perid_members = [(next(next_id), None) for _ in range(population)]
+    newperid_members = [(None, next(next_id)) for _ in range(population)]
+
+    scenarios = rng.choices(list(weights), weights=list(weights.values()), k=total)
+
+    upgrades: list[tuple[int, int]] = []
+    requests: list[tuple[str, str, dict[str, str]]] = []
+    for scenario in scenarios:
+        rights = benchmark.DEFAULT_RIGHTS
+        if scenario in ("perid", "newperid") and rng.random() < rights_churn:
+            rights = rng.choice(RIGHTS_CHOICES[1:])
+
+        match scenario:
+            case "perid":
+                perid, newperid = rng.choice(perid_members)
+            case "newperid":
+                perid, newperid = rng.choice(newperid_members)
+            case "upgrade":
+                perid, newperid = next(next_id), next(next_id)
+                upgrades.append((perid, newperid))
+            case "new":
+                perid, newperid = next(next_id), None
+
+        requests.append(
+            (scenario, "/controll-redirect/", token_for(perid, newperid, rights))
+        )
+
+    provision(
+        perid_members
+        + newperid_members
+        + [(None, newperid) for _, newperid in upgrades],
+        groups,
+    )
+
+    # imported here so that the application is built with the settings the
+    # command was started with.
+    from config.asgi import application
+
+    try:
+        samples, duration = asyncio.run(
+            benchmark.replay(application, requests, concurrency=concurrency, host=host)
+        )
+    finally:
+        if not keep:
+            bench_members().delete()
+
+    summaries = [benchmark.summarize("all", samples, duration)] + [
+        benchmark.summarize(
+            scenario, (s for s in samples if s.scenario == scenario), duration
+        )
+        for scenario in SCENARIOS
+        if scenario in weights
+    ]
+
+    if as_json:
+        click.echo(
+            json.dumps(
+                {
+                    "requests": total,
+                    "concurrency": concurrency,
+                    "duration": duration,
+                    "summaries": [dataclasses.asdict(s) for s in summaries],
+                },
+                indent=2,
+            )
+        )
+        return
+
+    click.echo(
+        f"{total} logins at concurrency {concurrency} in {duration:.2f}s"
+        f" ({total / duration:.1f} logins/s)"
+    )
+    click.echo(benchmark.SUMMARY_HEADER)
+    for summary in summaries:
+        click.echo(summary.as_row())
@@ -0,0 +1,128 @@
+"""Compare rendering pages with nomnom's context processors and with ours.
+
+Each page is fetched repeatedly, through a fresh ASGI handler built with one
+set of context processors or the other: nomnom's `site` and
+`inject_login_form`, which work out everything up front, and the lazy ones in
+`seattle_2025_app.context_processors`. Pages are fetched anonymously, and as a
+benchmark member who is removed again afterwards.
+"""
+
+import asyncio
+import copy
+import dataclasses
+import json
+
+import djclick as click
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.test.utils import override_settings
+
+from seattle_2025_app import benchmark
+from seattle_2025_app.management.commands.bench_sessions import session_cookie
+
+PROCESSORS = {
+    "upstream": "nomnom.nominate.context_processors",
+    "lazy": "seattle_2025_app.context_processors",
+}
+REPLACED = ("site", "inject_login_form")
+
+BENCH_USERNAME = "bench.render"
+
+
+def templates_with(module: str) -> list[dict]:
+    """`settings.TEMPLATES`, with the site processors taken from `module`."""
+    templates = copy.deepcopy(settings.TEMPLATES)
+    for backend in templates:
+        processors = backend.get("OPTIONS", {}).get("context_processors", [])
+        backend["OPTIONS"]["context_processors"] = [
+            f"{module}.{name.rsplit('.', 1)[1]}"
+            if name.rsplit(".", 1)[1] in REPLACED
+            else name
+            for name in processors
+        ]
+    return templates
+
+
+def measure(label, paths, total, concurrency, host, headers) -> benchmark.Summary:
+    application = ASGIHandler()
+    requests = [(label, path, {}) for path in paths]
+    # once to warm up, so that the samples are the steady state
+    asyncio.run(
+        benchmark.replay(
+            application, requests, concurrency=1, host=host, headers=headers
+        )
+    )
+    samples, duration = asyncio.run(
+        benchmark.replay(
+            application,
+            requests * total,
+            concurrency=concurrency,
+            host=host,
+            headers=headers,
+        )
+    )
+    return benchmark.summarize(label, samples, duration)
+
+
+@click.command()
+@click.option("--requests", "total", default=200, show_default=True)
+@click.option("--concurrency", default=10, show_default=True)
+@click.option(
+    "--path",
+    "paths",
+    multiple=True,
+    default=("/", "/e/"),
+    show_default=True,
+    help="A page to fetch; may be given more than once.",
+)
+@click.option("--host", default="localhost", show_default=True)
+@click.option("--json", "as_json", is_flag=True, help="Emit the summary as JSON.")
+def main(total, concurrency, paths, host, as_json):
+    """Fetch each PATH TOTAL times with each set of context processors."""
+    UserModel = get_user_model()
+    UserModel.objects.filter(username=BENCH_USERNAME).delete()
+    user = UserModel.objects.create_user(
+        username=BENCH_USERNAME, email="bench.render@example.com"
+    )
+
+    summaries = []
+    try:
+        cookie = session_cookie(settings.SESSION_ENGINE.rsplit(".", 1)[1], user)
+        for label, module in PROCESSORS.items():
+            with override_settings(TEMPLATES=templates_with(module)):
+                for who, headers in (("anonymous", []), ("member", [cookie])):
+                    summaries.append(
+                        measure(
+                            f"{label} {who}",
+                            paths,
+                            total,
+                            concurrency,
+                            host,
+                            headers,
+                        )
+                    )
+    finally:
+        user.delete()
+
+    if as_json:
+        click.echo(
+            json.dumps(
+                {
+                    "requests": total,
+                    "concurrency": concurrency,
+                    "paths": list(paths),
+                    "summaries": [dataclasses.asdict(s) for s in summaries],
+                },
+                indent=2,
+            )
+        )
+        return
+
+    click.echo(
+        f"{total} requests for each of {', '.join(paths)} per set of"
+        f" context processors, at concurrency {concurrency}"
+    )
+    click.echo(benchmark.SUMMARY_HEADER)
+    for summary in summaries:
+        click.echo(summary.as_row())
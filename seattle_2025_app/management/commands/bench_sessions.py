@@ -0,0 +1,111 @@
+"""Compare what each session engine costs a logged-in page view.
+
+A benchmark member is logged in once per engine, and the same page is then
+fetched repeatedly with that session's cookie, through a fresh ASGI handler
+built with the engine in place. The member is removed again afterwards.
+"""
+
+import asyncio
+import dataclasses
+import json
+from importlib import import_module
+
+import djclick as click
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+    get_user_model,
+)
+from django.core.handlers.asgi import ASGIHandler
+from django.test.utils import override_settings
+
+from seattle_2025_app import benchmark
+
+ENGINES = ("db", "cached_db", "cache")
+
+BENCH_USERNAME = "bench.sessions"
+
+
+def session_cookie(engine: str, user) -> tuple[bytes, bytes]:
+    SessionStore = import_module(
+        f"django.contrib.sessions.backends.{engine}"
+    ).SessionStore
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return (b"cookie", f"{settings.SESSION_COOKIE_NAME}={session.session_key}".encode())
+
+
+@click.command()
+@click.option("--requests", "total", default=200, show_default=True)
+@click.option("--concurrency", default=10, show_default=True)
+@click.option("--path", default="/", show_default=True)
+@click.option("--host", default="localhost", show_default=True)
+@click.option(
+    "--engines",
+    default=",".join(ENGINES),
+    show_default=True,
+    help="The session engines to compare.",
+)
+@click.option("--json", "as_json", is_flag=True, help="Emit the summary as JSON.")
+def main(total, concurrency, path, host, engines, as_json):
+    """Fetch PATH as a logged-in member under each session engine."""
+    UserModel = get_user_model()
+    UserModel.objects.filter(username=BENCH_USERNAME).delete()
+    user = UserModel.objects.create_user(
+        username=BENCH_USERNAME, email="bench.sessions@example.com"
+    )
+
+    summaries = []
+    try:
+        for engine in engines.split(","):
+            with override_settings(
+                SESSION_ENGINE=f"django.contrib.sessions.backends.{engine}"
+            ):
+                cookie = session_cookie(engine, user)
+                application = ASGIHandler()
+                # once to warm up, so that the samples are the steady state
+                asyncio.run(
+                    benchmark.replay(
+                        application,
+                        [(engine, path, {})],
+                        concurrency=1,
+                        host=host,
+                        headers=[cookie],
+                    )
+                )
+                samples, duration = asyncio.run(
+                    benchmark.replay(
+                        application,
+                        [(engine, path, {})] * total,
+                        concurrency=concurrency,
+                        host=host,
+                        headers=[cookie],
+                    )
+                )
+            summaries.append(benchmark.summarize(engine, samples, duration))
+    finally:
+        user.delete()
+
+    if as_json:
+        click.echo(
+            json.dumps(
+                {
+                    "requests": total,
+                    "concurrency": concurrency,
+                    "path": path,
+                    "summaries": [dataclasses.asdict(s) for s in summaries],
+                },
+                indent=2,
+            )
+        )
+        return
+
+    click.echo(f"{total} requests for {path} per engine, at concurrency {concurrency}")
+    click.echo(benchmark.SUMMARY_HEADER)
+    for summary in summaries:
+        click.echo(summary.as_row())
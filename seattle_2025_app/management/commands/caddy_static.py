@@ -0,0 +1,60 @@
+"""Write a Caddy snippet that serves the collected static files itself.
+
+With it in place, requests under `STATIC_URL` never reach the workers: Caddy
+serves the files from ROOT (wherever the `staticfiles` volume can be found on
+the Caddy host), using the .br and .gz files `collectstatic` wrote next to
+each one, and marks the hashed names as immutable, just as whitenoise would.
+
+The deployed Caddyfiles import `static.caddy*` from their own directory, so:
+
+    manage.py caddy_static --root /srv/nomnom/staticfiles > deploy/production/static.caddy
+
+Without the file, whitenoise keeps serving them as before.
+"""
+
+import djclick as click
+from django.conf import settings
+
+# the names ManifestStaticFilesStorage gives hashed copies: name.0123456789ab.ext
+HASHED_NAME = r"\.[0-9a-f]{12}\.[^./]+$"
+
+# whitenoise's idea of forever, and its default for files that can change
+IMMUTABLE_MAX_AGE = 10 * 365 * 24 * 60 * 60
+MUTABLE_MAX_AGE = 60
+
+
+def caddy_block(root: str, static_url: str) -> str:
+    prefix = "/" + static_url.strip("/")
+    return f"""\
+# generated by `manage.py caddy_static`; serve {prefix}/ without the app.
+handle_path {prefix}/* {{
+	root * {root}
+
+	@hashed path_regexp {HASHED_NAME}
+	header @hashed Cache-Control "max-age={IMMUTABLE_MAX_AGE}, public, immutable"
+
+	@mutable not path_regexp {HASHED_NAME}
+	header @mutable Cache-Control "max-age={MUTABLE_MAX_AGE}, public"
+
+	header Access-Control-Allow-Origin *
+
+	file_server {{
+		precompressed br gzip
+	}}
+}}
+"""
+
+
+@click.command()
+@click.option(
+    "--root",
+    default=None,
+    help="Where Caddy finds the collected static files; by default, STATIC_ROOT.",
+)
+def main(root):
+    """Print a Caddy block that serves STATIC_URL from the collected files."""
+    root = root or settings.STATIC_ROOT
+    if not root:
+        raise click.ClickException("STATIC_ROOT isn't set; pass --root")
+
+    click.echo(caddy_block(str(root), settings.STATIC_URL), nl=False)
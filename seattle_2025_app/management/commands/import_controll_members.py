@@ -0,0 +1,278 @@
+"""Pre-provision members from a ConTroll membership export.
+
+Each record carries the same fields as a ConTroll login token (`perid`,
+`newperid`, `email`, `first_name`, `last_name`, `fullName` and `rights`), as
+either CSV with a header row or one JSON object per line. Members are created
+exactly as `create_member` would create them on their first login, but a
+batch at a time, so that opening night doesn't have to.
+
+Members we already know, by either ID, are left alone: their next login takes
+care of any change, and re-running an import is harmless.
+"""
+
+import csv
+import json
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from itertools import batched
+from pathlib import Path
+
+import djclick as click
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django_svcs.apps import svcs_from
+from nomnom.convention import ConventionConfiguration
+from nomnom.nominate.models import NominatingMemberProfile
+
+from seattle_2025_app.auth import canonical_rights, create_username, wsfs_groups
+from seattle_2025_app.models import ControllPerson
+
+
+def parse_id(value) -> int | None:
+    if value is None or str(value).strip() == "":
+        return None
+    return int(value)
+
+
+@dataclass(frozen=True)
+class MemberRecord:
+    perid: int | None
+    newperid: int | None
+    email: str
+    first_name: str
+    last_name: str
+    full_name: str
+    rights: str
+
+    @classmethod
+    def from_export(cls, record: dict) -> "MemberRecord":
+        first_name = record.get("first_name") or ""
+        last_name = record.get("last_name") or ""
+        return cls(
+            perid=parse_id(record.get("perid")),
+            newperid=parse_id(record.get("newperid")),
+            email=record.get("email") or "",
+            first_name=first_name,
+            last_name=last_name,
+            full_name=record.get("fullName") or f"{first_name} {last_name}".strip(),
+            rights=canonical_rights((record.get("rights") or "").split(",")),
+        )
+
+    @property
+    def username(self) -> str:
+        return create_username(
+            str(self.perid) if self.perid else None,
+            str(self.newperid) if self.newperid else None,
+        )
+
+    @property
+    def member_number(self) -> str:
+        return str(self.perid or self.newperid)
+
+
+def read_export(stream, format: str) -> Iterator[dict]:
+    if format == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: int = 0
+    existing: int = 0
+    invalid: int = 0
+
+
+def import_batch(
+    records: list[MemberRecord], groups_by_right: dict, result: ImportResult
+) -> None:
+    UserModel = get_user_model()
+    UserGroups = UserModel.groups.through
+
+    known = list(
+        ControllPerson.objects.filter(
+            Q(perid__in=[r.perid for r in records if r.perid])
+            | Q(newperid__in=[r.newperid for r in records if r.newperid])
+        ).values_list("perid", "newperid")
+    )
+    seen_perids = {perid for perid, _ in known if perid}
+    seen_newperids = {newperid for _, newperid in known if newperid}
+
+    # a file can mention someone more than once, by either ID; the first
+    # record wins.
+    by_username: dict[str, MemberRecord] = {}
+    for record in records:
+        if (
+            record.perid in seen_perids
+            or record.newperid in seen_newperids
+            or record.username in by_username
+        ):
+            result.existing += 1
+            continue
+
+        by_username[record.username] = record
+        if record.perid:
+            seen_perids.add(record.perid)
+        if record.newperid:
+            seen_newperids.add(record.newperid)
+
+    if not by_username:
+        return
+
+    with transaction.atomic():
+        # A user without a ControllPerson is a first login that didn't finish;
+        # we complete it, but leave its groups for the next login to sync.
+        preexisting = set(
+            UserModel.objects.filter(username__in=by_username).values_list(
+                "username", flat=True
+            )
+        )
+        UserModel.objects.bulk_create(
+            [
+                UserModel(
+                    username=username,
+                    email=record.email,
+                    first_name=record.first_name,
+                    last_name=record.last_name,
+                )
+                for username, record in by_username.items()
+            ],
+            ignore_conflicts=True,
+        )
+        user_ids = dict(
+            UserModel.objects.filter(username__in=by_username).values_list(
+                "username", "pk"
+            )
+        )
+
+        ControllPerson.objects.bulk_create(
+            [
+                ControllPerson(
+                    user_id=user_ids[username],
+                    perid=record.perid,
+                    newperid=record.newperid,
+                    applied_rights=None if username in preexisting else record.rights,
+                )
+                for username, record in by_username.items()
+            ],
+            ignore_conflicts=True,
+        )
+
+        # A login can claim one of these IDs while we work, in which case our
+        # ControllPerson was dropped as a conflict; that member is theirs.
+        provisioned = {
+            (user_id, perid, newperid)
+            for user_id, perid, newperid in ControllPerson.objects.filter(
+                user_id__in=user_ids.values()
+            ).values_list("user_id", "perid", "newperid")
+        }
+        claimed = len(by_username)
+        by_username = {
+            username: record
+            for username, record in by_username.items()
+            if (user_ids[username], record.perid, record.newperid) in provisioned
+        }
+        result.existing += claimed - len(by_username)
+
+        NominatingMemberProfile.objects.bulk_create(
+            [
+                NominatingMemberProfile(
+                    user_id=user_ids[username],
+                    preferred_name=record.full_name,
+                    member_number=record.member_number,
+                )
+                for username, record in by_username.items()
+            ],
+            ignore_conflicts=True,
+        )
+        UserGroups.objects.bulk_create(
+            [
+                UserGroups(user_id=user_ids[username], group_id=group.pk)
+                for username, record in by_username.items()
+                if username not in preexisting
+                for right in record.rights.split(",")
+                if (group := groups_by_right.get(right)) is not None
+            ],
+            ignore_conflicts=True,
+        )
+
+    result.created += len(by_username)
+
+
+def import_members(
+    records: Iterable[dict],
+    convention: ConventionConfiguration,
+    *,
+    batch_size: int = 1000,
+    progress=None,
+) -> ImportResult:
+    """Create the members in `records` that we don't already know."""
+    groups_by_right = wsfs_groups(convention)
+    result = ImportResult()
+
+    def parsed() -> Iterator[MemberRecord]:
+        for record in records:
+            result.rows += 1
+            try:
+                member = MemberRecord.from_export(record)
+            except ValueError:
+                result.invalid += 1
+                continue
+
+            if member.perid is None and member.newperid is None:
+                result.invalid += 1
+                continue
+
+            yield member
+
+    for batch in batched(parsed(), batch_size):
+        import_batch(list(batch), groups_by_right, result)
+        if progress is not None:
+            progress(result)
+
+    return result
+
+
+@click.command()
+@click.argument("export", type=click.Path(exists=True, allow_dash=True))
+@click.option(
+    "--format",
+    "export_format",
+    type=click.Choice(["csv", "jsonl"]),
+    default=None,
+    help="The export's format; by default, guessed from its extension.",
+)
+@click.option("--batch-size", default=1000, show_default=True)
+def main(export, export_format, batch_size):
+    """Import the members in a ConTroll EXPORT (CSV or JSONL; - for stdin)."""
+    if export_format is None:
+        export_format = "csv" if Path(export).suffix.lower() == ".csv" else "jsonl"
+
+    convention = svcs_from().get(ConventionConfiguration)
+    start = time.perf_counter()
+
+    def progress(result: ImportResult):
+        elapsed = time.perf_counter() - start
+        click.echo(f"{result.rows} rows, {result.rows / elapsed:.0f} rows/s", err=True)
+
+    with click.open_file(export, encoding="utf-8", newline="") as stream:
+        result = import_members(
+            read_export(stream, export_format),
+            convention,
+            batch_size=batch_size,
+            progress=progress,
+        )
+
+    elapsed = time.perf_counter() - start
+    click.echo(
+        f"Imported {result.rows} rows in {elapsed:.2f}s"
+        f" ({result.rows / elapsed if elapsed else 0:.0f} rows/s):"
+        f" {result.created} created, {result.existing} already known,"
+        f" {result.invalid} invalid"
+    )
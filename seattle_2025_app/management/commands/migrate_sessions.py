@@ -0,0 +1,68 @@
+"""Copy live sessions out of the database and into the session cache.
+
+Switching `NOM_SESSION_ENGINE` from "db" to "cache" would otherwise log
+everybody out, because the cache starts out empty. Run this before restarting
+with the new engine (`--engine cache`), and again afterwards to pick up any
+session that was written in between; sessions already in the cache are never
+overwritten, so it's safe to repeat.
+
+For "cached_db" nothing is lost either way, as the sessions stay in the
+database; running this just saves each one a trip there on its first use.
+"""
+
+from importlib import import_module
+from itertools import batched
+
+import djclick as click
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.utils import timezone
+
+ENGINES = {
+    "cache": "django.contrib.sessions.backends.cache",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+}
+
+
+@click.command()
+@click.option(
+    "--engine",
+    type=click.Choice(list(ENGINES)),
+    default=None,
+    help="The engine to copy sessions for; by default, the configured one.",
+)
+@click.option("--batch-size", default=1000, show_default=True)
+def main(engine, batch_size):
+    """Copy unexpired database sessions into the session cache."""
+    if engine is None:
+        engine = next(
+            (name for name, path in ENGINES.items() if path == settings.SESSION_ENGINE),
+            None,
+        )
+        if engine is None:
+            raise click.ClickException(
+                f"{settings.SESSION_ENGINE} doesn't use the cache; pass --engine"
+            )
+
+    SessionStore = import_module(ENGINES[engine]).SessionStore
+    cache = caches[settings.SESSION_CACHE_ALIAS]
+
+    now = timezone.now()
+    live = Session.objects.filter(expire_date__gt=now).order_by("pk")
+
+    copied = skipped = 0
+    for batch in batched(live.iterator(chunk_size=batch_size), batch_size):
+        for session in batch:
+            store = SessionStore(session.session_key)
+            timeout = int((session.expire_date - now).total_seconds())
+            if cache.add(store.cache_key, session.get_decoded(), timeout):
+                copied += 1
+            else:
+                skipped += 1
+        click.echo(f"{copied + skipped} sessions...", err=True)
+
+    click.echo(
+        f"Copied {copied} live sessions into the {engine} session cache"
+        f" ({skipped} were already there)."
+    )
@@ -0,0 +1,164 @@
+"""Measure what it costs a fresh worker to start and serve its first request.
+
+A child Python process is started with `-X importtime`, the same way granian
+starts a worker: it imports `config.asgi` (which sets Django up and warms the
+worker; see `config.warmup`) and then serves one GET through the ASGI
+application. We report how long each of those took, and which modules cost
+the most to import, by their cumulative time (the module plus everything it
+imported first).
+
+With `--target celery`, the child starts the way a Celery worker does
+instead: it imports `nomnom.celery_app` and has the app's loader set the worker
+up, which sets Django up and imports every app's tasks. There's no request to
+serve, so only the boot is timed.
+
+It runs with the environment of this command, so `NOM_DEBUG` and friends
+apply; compare a run with `NOM_DEBUG=true` against one without to see what
+the debug-only apps cost.
+"""
+
+import dataclasses
+import json
+import os
+import subprocess
+import sys
+from collections.abc import Iterable
+
+import djclick as click
+from django.conf import settings
+
+CHILD = """
+import asyncio, json, os, sys, time
+
+start = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+from config.asgi import application
+
+booted = time.perf_counter()
+from seattle_2025_app import benchmark
+
+status = asyncio.run(
+    benchmark.asgi_get(application, sys.argv[1], {}, host=sys.argv[2])
+)
+served = time.perf_counter()
+
+print(json.dumps({"boot": booted - start, "first_request": served - booted, "status": status}))
+"""
+
+CELERY_CHILD = """
+import json, time
+
+start = time.perf_counter()
+from nomnom import celery_app
+
+celery_app.loader.init_worker()
+booted = time.perf_counter()
+
+print(json.dumps({"boot": booted - start}))
+"""
+
+CHILDREN = {"asgi": CHILD, "celery": CELERY_CHILD}
+
+
+@dataclasses.dataclass
+class ImportCost:
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(lines: Iterable[str]) -> list[ImportCost]:
+    """The modules in `-X importtime` output, in the order they finished."""
+    costs = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # the header
+            continue
+        self_us, cumulative_us, module = fields
+        costs.append(ImportCost(module.strip(), int(self_us), int(cumulative_us)))
+    return costs
+
+
+def by_package(costs: Iterable[ImportCost]) -> list[ImportCost]:
+    """The self time of every module, summed up by top-level package.
+
+    Cumulative times can't be summed (they overlap), so a package's cumulative
+    time is the largest of its modules'.
+    """
+    packages: dict[str, ImportCost] = {}
+    for cost in costs:
+        package = cost.module.split(".")[0]
+        total = packages.setdefault(package, ImportCost(package, 0, 0))
+        total.self_us += cost.self_us
+        total.cumulative_us = max(total.cumulative_us, cost.cumulative_us)
+    return list(packages.values())
+
+
+@click.command()
+@click.option(
+    "--target",
+    type=click.Choice(list(CHILDREN)),
+    default="asgi",
+    show_default=True,
+    help="Start a web worker or a Celery worker.",
+)
+@click.option("--path", default="/", show_default=True)
+@click.option("--host", default="localhost", show_default=True)
+@click.option("--top", default=25, show_default=True)
+@click.option(
+    "--by-package",
+    "per_package",
+    is_flag=True,
+    help="Total the import costs by top-level package.",
+)
+@click.option("--json", "as_json", is_flag=True, help="Emit the report as JSON.")
+def main(target, path, host, top, per_package, as_json):
+    """Profile the imports and first request of a fresh worker."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILDREN[target], path, host],
+        cwd=settings.BASE_DIR,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        click.echo(result.stderr, err=True)
+        raise click.ClickException("The worker didn't start")
+
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    costs = parse_importtime(result.stderr.splitlines())
+    if per_package:
+        costs = by_package(costs)
+    costs = sorted(costs, key=lambda c: c.cumulative_us, reverse=True)[:top]
+
+    if as_json:
+        click.echo(
+            json.dumps(
+                {
+                    "target": target,
+                    "debug": settings.DEBUG,
+                    **timings,
+                    "imports": [dataclasses.asdict(c) for c in costs],
+                },
+                indent=2,
+            )
+        )
+        return
+
+    click.echo(f"boot:          {timings['boot'] * 1000:.1f} ms ({target})")
+    if "first_request" in timings:
+        click.echo(
+            f"first request: {timings['first_request'] * 1000:.1f} ms"
+            f" (GET {path}: {timings['status']})"
+        )
+    click.echo()
+    click.echo(
+        f"{'cumulative ms':>13} {'self ms':>9}  {'package' if per_package else 'module'}"
+    )
+    for cost in costs:
+        click.echo(
+            f"{cost.cumulative_us / 1000:>13.1f} {cost.self_us / 1000:>9.1f}  {cost.module}"
+        )
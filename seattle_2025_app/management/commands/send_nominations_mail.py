@@ -0,0 +1,43 @@
+"""Send every member who has nominated in an election a copy of their ballot.
+
+By default this only queues the work for the Celery workers, a batch of
+members per task; `--inline` sends everything from this process instead,
+which is handy against a local mail catcher.
+"""
+
+import djclick as click
+from nomnom.nominate.models import Election
+
+from seattle_2025_app import tasks
+
+
+@click.command()
+@click.argument("election_id")
+@click.option("--message", default=None, help="A note to put above the ballot.")
+@click.option("--batch-size", default=tasks.BATCH_SIZE, show_default=True)
+@click.option("--chunk-size", default=tasks.CHUNK_SIZE, show_default=True)
+@click.option("--inline", is_flag=True, help="Send from here, not from Celery.")
+def main(election_id, message, batch_size, chunk_size, inline):
+    """Email the nominating members of ELECTION_ID their nominations."""
+    try:
+        election = Election.objects.get(slug=election_id)
+    except Election.DoesNotExist:
+        raise click.ClickException(f"There's no election {election_id!r}")
+
+    if not inline:
+        batches = tasks.send_all_nominations.delay(
+            election_id, message, batch_size, chunk_size
+        )
+        click.echo(f"Queued the nominations mail for {election} ({batches.id}).")
+        return
+
+    sent = failed = 0
+    for member_ids in tasks.member_batches(election, batch_size):
+        stats = tasks.send_nominations_batch(
+            election_id, member_ids, message, chunk_size
+        )
+        sent += stats["sent"]
+        failed += stats["failed"]
+        click.echo(f"{sent + failed} members...", err=True)
+
+    click.echo(f"Sent {sent} nominations emails for {election} ({failed} failed).")
@@ -0,0 +1,349 @@
+"""How ConTroll logins are going, in a form Prometheus can scrape.
+
+Every login through `controll_redirect` is measured: how it turned out, how
+long it took, how long we spent verifying the JWT, and how many queries it ran
+and for how long. The numbers are kept in Redis so that every worker adds to
+the same counters; `login_metrics` renders them in the Prometheus text format.
+
+The bulk nominations mail (see `tasks`) keeps its sent and failed counts in
+the same place, so they're scraped along with the logins.
+"""
+
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Literal
+
+import redis
+import sentry_sdk
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+Outcome = Literal["returning", "upgraded", "created", "rejected"]
+OUTCOMES: tuple[Outcome, ...] = ("returning", "upgraded", "created", "rejected")
+
+
+# --- queries ---------------------------------------------------------------
+
+
+@dataclass
+class QueryStats:
+    queries: int = 0
+    db_time: float = 0.0
+
+
+# Every `count_queries` block that is open in this context; a query counts
+# towards all of them, so that a benchmark can measure a login that is
+# measuring itself.
+_active_query_stats: ContextVar[tuple[QueryStats, ...]] = ContextVar(
+    "active_query_stats", default=()
+)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """Count the queries run, on any connection, by the code in the block.
+
+    The stats travel with the context, so queries run in `sync_to_async`
+    threads on behalf of the block are counted too. Nothing is counted unless
+    `install_query_counter` has been called.
+    """
+    stats = QueryStats()
+    token = _active_query_stats.set(_active_query_stats.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active_query_stats.reset(token)
+
+
+def _count_query(execute, sql, params, many, context):
+    if not (active := _active_query_stats.get()):
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        for stats in active:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+
+def _install_query_counter(connection) -> None:
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _install_query_counter(connection)
+
+
+def install_query_counter() -> None:
+    """Attach the query counter to every database connection.
+
+    Django gives each thread its own connection, so the wrapper is attached as
+    connections are created, as well as to any that already exist.
+    """
+    connection_created.connect(
+        _on_connection_created, dispatch_uid="seattle_2025_app.metrics"
+    )
+    for connection in connections.all(initialized_only=True):
+        _install_query_counter(connection)
+
+
+# --- logins ----------------------------------------------------------------
+
+
+@dataclass
+class LoginMeasurement:
+    outcome: Outcome | None = None
+    total_time: float = 0.0
+    jwt_time: float = 0.0
+    queries: QueryStats = field(default_factory=QueryStats)
+
+
+_current_login: ContextVar[LoginMeasurement | None] = ContextVar(
+    "current_login", default=None
+)
+
+
+@contextmanager
+def measure_login() -> Iterator[LoginMeasurement]:
+    measurement = LoginMeasurement()
+    token = _current_login.set(measurement)
+    start = time.perf_counter()
+    try:
+        with count_queries() as queries:
+            measurement.queries = queries
+            yield measurement
+    finally:
+        measurement.total_time = time.perf_counter() - start
+        _current_login.reset(token)
+
+
+def note_outcome(outcome: Outcome) -> None:
+    """Say how the login in progress turned out.
+
+    The first outcome noted sticks, so the backend can say that a login was an
+    upgrade before the view, which only knows that it succeeded, gets to it.
+    """
+    if (measurement := _current_login.get()) is not None:
+        if measurement.outcome is None:
+            measurement.outcome = outcome
+
+
+@contextmanager
+def timing_jwt() -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if (measurement := _current_login.get()) is not None:
+            measurement.jwt_time += time.perf_counter() - start
+
+
+# --- storage ---------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class Histogram:
+    name: str
+    help: str
+    buckets: tuple[float, ...]
+
+
+LOGINS_TOTAL = "controll_logins_total"
+
+DURATION = Histogram(
+    "controll_login_duration_seconds",
+    "Time to handle a ConTroll login, by outcome.",
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+DB_TIME = Histogram(
+    "controll_login_db_seconds",
+    "Time a ConTroll login spent in the database, by outcome.",
+    (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+JWT_TIME = Histogram(
+    "controll_login_jwt_seconds",
+    "Time a ConTroll login spent verifying its token, by outcome.",
+    (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+QUERIES = Histogram(
+    "controll_login_queries",
+    "Database queries run by a ConTroll login, by outcome.",
+    (0, 1, 2, 3, 5, 8, 13, 21),
+)
+
+HISTOGRAMS = (DURATION, DB_TIME, JWT_TIME, QUERIES)
+
+METRICS_KEY = "controll-metrics"
+
+
+def _fields(measurement: LoginMeasurement) -> tuple[dict[str, int], dict[str, float]]:
+    """The counter increments for one login, as (integer, float) hash fields.
+
+    Histogram buckets are stored uncumulated, one field per bucket, so that
+    each observation touches exactly one of them; they are summed up when
+    they're rendered.
+    """
+    outcome = measurement.outcome
+    counts = {f"{LOGINS_TOTAL}|{outcome}": 1}
+    sums = {}
+    for histogram, value in (
+        (DURATION, measurement.total_time),
+        (DB_TIME, measurement.queries.db_time),
+        (JWT_TIME, measurement.jwt_time),
+        (QUERIES, measurement.queries.queries),
+    ):
+        bucket = next((b for b in histogram.buckets if value <= b), "+Inf")
+        counts[f"{histogram.name}|{outcome}|{bucket}"] = 1
+        sums[f"{histogram.name}|{outcome}|sum"] = value
+    return counts, sums
+
+
+class LocalStore:
+    """Counters for this process only, for when there's no Redis to share."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: dict[str, float] = {}
+
+    def add(self, counts: dict[str, int], sums: dict[str, float]) -> None:
+        with self._lock:
+            for name, value in (counts | sums).items():
+                self._values[name] = self._values.get(name, 0) + value
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class RedisStore:
+    """Counters in a Redis hash, shared by every worker."""
+
+    def __init__(self, url: str):
+        self._client = redis.Redis.from_url(url)
+
+    def add(self, counts: dict[str, int], sums: dict[str, float]) -> None:
+        pipeline = self._client.pipeline(transaction=False)
+        for name, value in counts.items():
+            pipeline.hincrby(METRICS_KEY, name, value)
+        for name, value in sums.items():
+            pipeline.hincrbyfloat(METRICS_KEY, name, value)
+        pipeline.execute()
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            name.decode(): float(value)
+            for name, value in self._client.hgetall(METRICS_KEY).items()
+        }
+
+    def clear(self) -> None:
+        self._client.delete(METRICS_KEY)
+
+
+_store: LocalStore | RedisStore | None = None
+_store_lock = threading.Lock()
+
+
+def store() -> LocalStore | RedisStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            if isinstance(caches["default"], RedisCache):
+                _store = RedisStore(settings.CACHES["default"]["LOCATION"])
+            else:
+                _store = LocalStore()
+        return _store
+
+
+def reset_store() -> None:
+    global _store
+    with _store_lock:
+        _store = None
+
+
+def record(measurement: LoginMeasurement) -> None:
+    if measurement.outcome is None:
+        # the login failed in some way we didn't expect; Sentry has it.
+        return
+
+    try:
+        store().add(*_fields(measurement))
+    except redis.RedisError as e:
+        # never fail a login over its metrics.
+        sentry_sdk.capture_exception(e)
+
+
+MAIL_SENT = "nominations_mail_sent_total"
+MAIL_FAILED = "nominations_mail_failed_total"
+MAIL_SECONDS = "nominations_mail_seconds_total"
+
+MAIL_COUNTERS = (
+    (MAIL_SENT, "Nominations emails sent."),
+    (MAIL_FAILED, "Nominations emails that could not be sent."),
+    (MAIL_SECONDS, "Time spent rendering and sending nominations emails."),
+)
+
+
+def record_mail(sent: int, failed: int, seconds: float) -> None:
+    try:
+        store().add({MAIL_SENT: sent, MAIL_FAILED: failed}, {MAIL_SECONDS: seconds})
+    except redis.RedisError as e:
+        sentry_sdk.capture_exception(e)
+
+
+# --- exposition ------------------------------------------------------------
+
+
+def _number(value: float) -> str:
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(values: dict[str, float]) -> str:
+    """The counters in the Prometheus text exposition format."""
+    lines = [
+        f"# HELP {LOGINS_TOTAL} ConTroll logins, by outcome.",
+        f"# TYPE {LOGINS_TOTAL} counter",
+    ]
+    for outcome in OUTCOMES:
+        total = values.get(f"{LOGINS_TOTAL}|{outcome}", 0)
+        lines.append(f'{LOGINS_TOTAL}{{outcome="{outcome}"}} {_number(total)}')
+
+    for histogram in HISTOGRAMS:
+        lines.append(f"# HELP {histogram.name} {histogram.help}")
+        lines.append(f"# TYPE {histogram.name} histogram")
+        for outcome in OUTCOMES:
+            cumulative = 0.0
+            for bucket in (*histogram.buckets, "+Inf"):
+                cumulative += values.get(f"{histogram.name}|{outcome}|{bucket}", 0)
+                lines.append(
+                    f'{histogram.name}_bucket{{outcome="{outcome}",le="{bucket}"}}'
+                    f" {_number(cumulative)}"
+                )
+            total = values.get(f"{histogram.name}|{outcome}|sum", 0)
+            lines.append(
+                f'{histogram.name}_sum{{outcome="{outcome}"}} {_number(total)}'
+            )
+            lines.append(
+                f'{histogram.name}_count{{outcome="{outcome}"}} {_number(cumulative)}'
+            )
+
+    for name, help in MAIL_COUNTERS:
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name} {_number(values.get(name, 0))}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            "seattle_2025_app",
+            "0002_controllperson_controll_person_perid_index_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="controllperson",
+            name="applied_rights",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -18,3 +18,19 @@ class ControllPerson(models.Model):
     user = models.OneToOneField(
         UserModel, on_delete=models.CASCADE, related_name="controll_person"
     )
+
+    # The WSFS rights, in canonical form, that we last synced this person's
+    # groups to. Logins whose rights claim matches can skip the sync; it's
+    # cleared if someone changes those groups by other means.
+    applied_rights = models.CharField(max_length=64, null=True, blank=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # the IDs as they were loaded, so that a save that changes them can
+        # drop the cached lookups for the old ones too (see `signals`)
+        instance._loaded_ids = (
+            instance.__dict__.get("perid"),
+            instance.__dict__.get("newperid"),
+        )
+        return instance
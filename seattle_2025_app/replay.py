@@ -0,0 +1,151 @@
+"""Remember the tokens we've just logged someone in with.
+
+Email clients prefetch login links and people double-click them, so the exact
+same token tends to arrive several times within a few seconds. A repeat of a
+token we've already verified and acted on only needs the `login()`: the
+signature, the person lookup and the permission sync all come out the same.
+
+Entries are keyed by a digest of the token, live for a short window, and are
+kept in a small LRU in each worker in front of the shared Redis cache, so a
+repeat landing on another granian worker still benefits.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import redis
+import sentry_sdk
+from django.core.cache import cache
+
+from seattle_2025_app.identity import CacheStats
+
+REPLAY_TIMEOUT = 60
+LOCAL_MAX_ENTRIES = 1024
+
+
+@dataclass(frozen=True)
+class ReplayedLogin:
+    # Entries are keyed by the token itself, so the rights it carries can't
+    # differ from those we applied the first time; the user is all we need.
+    user_id: int
+
+
+class LRUCache:
+    """A small, thread-safe, size- and age-bounded mapping."""
+
+    def __init__(self, max_entries: int, timeout: float):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            try:
+                expires, value = self._entries[key]
+            except KeyError:
+                return None
+
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, timeout: float | None = None) -> None:
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_local = LRUCache(LOCAL_MAX_ENTRIES, REPLAY_TIMEOUT)
+
+stats = CacheStats()
+
+
+def _key(token: str) -> str:
+    return "controll-replay:" + hashlib.sha256(token.encode()).hexdigest()
+
+
+def lookup(token: str) -> ReplayedLogin | None:
+    key = _key(token)
+
+    if (replayed := _local.get(key)) is not None:
+        stats.hit()
+        return replayed
+
+    try:
+        replayed = cache.get(key)
+    except redis.RedisError as e:
+        # the cache is an optimisation; never fail a login because of it.
+        sentry_sdk.capture_exception(e)
+        replayed = None
+
+    return _shared_result(key, replayed)
+
+
+async def alookup(token: str) -> ReplayedLogin | None:
+    """See lookup()."""
+    key = _key(token)
+
+    if (replayed := _local.get(key)) is not None:
+        stats.hit()
+        return replayed
+
+    try:
+        replayed = await cache.aget(key)
+    except redis.RedisError as e:
+        sentry_sdk.capture_exception(e)
+        replayed = None
+
+    return _shared_result(key, replayed)
+
+
+def _shared_result(key: str, replayed: ReplayedLogin | None) -> ReplayedLogin | None:
+    if replayed is None:
+        stats.miss()
+        return None
+
+    stats.hit()
+    _local.set(key, replayed)
+    return replayed
+
+
+def remember(token: str, user_id: int) -> None:
+    key = _key(token)
+    replayed = ReplayedLogin(user_id=user_id)
+
+    _local.set(key, replayed)
+    try:
+        cache.set(key, replayed, REPLAY_TIMEOUT)
+    except redis.RedisError as e:
+        sentry_sdk.capture_exception(e)
+
+
+async def aremember(token: str, user_id: int) -> None:
+    key = _key(token)
+    replayed = ReplayedLogin(user_id=user_id)
+
+    _local.set(key, replayed)
+    try:
+        await cache.aset(key, replayed, REPLAY_TIMEOUT)
+    except redis.RedisError as e:
+        sentry_sdk.capture_exception(e)
+
+
+def clear_local() -> None:
+    _local.clear()
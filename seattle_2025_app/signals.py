@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from nomnom.nominate.models import NominatingMemberProfile
+
+from seattle_2025_app import auth, identity, user_cache
+from seattle_2025_app.models import ControllPerson
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    # drop it now so this worker stops using it, and again once the change is
+    # committed, in case a concurrent login re-read the old row in between.
+    auth.clear_wsfs_group_cache()
+    transaction.on_commit(auth.clear_wsfs_group_cache)
+
+
+@receiver(post_save, sender=ControllPerson)
+@receiver(post_delete, sender=ControllPerson)
+def controll_person_changed(sender, instance, **kwargs):
+    ids = (instance.perid, instance.newperid)
+    identity.forget(*ids)
+
+    # an admin may have changed them, in which case the old IDs still point at
+    # this person
+    loaded = getattr(instance, "_loaded_ids", None)
+    if loaded is not None and loaded != ids:
+        identity.forget(*loaded)
+    instance._loaded_ids = ids
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # every login saves last_login, which isn't cached; dropping the entry for
+    # that would leave each member's cache empty straight after they log in.
+    if update_fields is not None and not user_cache.depends_on(update_fields):
+        return
+
+    user_cache.forget(instance.pk)
+
+
+@receiver(post_save, sender=NominatingMemberProfile)
+@receiver(post_delete, sender=NominatingMemberProfile)
+def convention_profile_changed(sender, instance, **kwargs):
+    user_cache.forget(instance.user_id)
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def user_group_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # every change counts here, our own syncs included: the cached user's
+    # groups are out of date either way.
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    if not reverse:
+        user_cache.forget(instance.pk)
+    elif action == "pre_clear":
+        user_cache.forget(*instance.user_set.values_list("pk", flat=True))
+    else:
+        user_cache.forget(*pk_set)
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # someone changed group memberships other than through a login; forget the
+    # rights we applied so that the next login syncs them again. This doesn't
+    # bother working out whether the WSFS groups were involved: the cost of
+    # being wrong is one extra sync.
+    if kwargs.get("wsfs_sync") or action not in (
+        "post_add",
+        "post_remove",
+        "pre_clear",
+    ):
+        return
+
+    if not reverse:
+        people = ControllPerson.objects.filter(user=instance)
+    elif action == "pre_clear":
+        people = ControllPerson.objects.filter(user__groups=instance)
+    else:
+        people = ControllPerson.objects.filter(user_id__in=pk_set)
+
+    for perid, newperid in people.values_list("perid", "newperid"):
+        identity.forget(perid, newperid)
+    people.update(applied_rights=None)
@@ -0,0 +1,196 @@
+"""Sending every nominating member their nominations, in bulk.
+
+`send_all_nominations` walks the members who have nominated in an election a
+batch at a time, and queues a `send_nominations_batch` for each batch. The
+walk uses keyset pagination on the member's id rather than a cursor: our
+connections go through pgbouncer, so server-side cursors are turned off.
+
+Each batch loads its members' nominations in a single query, renders the
+messages with templates that are only compiled once per worker, and sends
+them over one SMTP connection per chunk, rather than one per message. What was
+sent and what failed is added to the counters in `metrics`.
+"""
+
+import smtplib
+import time
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from functools import cache
+from itertools import batched, groupby
+from operator import attrgetter
+
+import sentry_sdk
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.contrib.sites.models import Site
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import Exists, OuterRef, Prefetch
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils.formats import localize
+from django_svcs.apps import svcs_from
+from nomnom.convention import ConventionConfiguration
+from nomnom.nominate import models
+
+from seattle_2025_app import metrics
+
+logger = get_task_logger(__name__)
+
+# members per queued task
+BATCH_SIZE = 500
+# messages per SMTP connection; most relays cap how many they'll take in one
+# session.
+CHUNK_SIZE = 50
+
+
+@dataclass
+class MailStats:
+    sent: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+
+def member_batches(
+    election: models.Election, batch_size: int = BATCH_SIZE
+) -> Iterator[list[int]]:
+    """The ids of the members with nominations in the election, a batch at a time."""
+    members = (
+        models.NominatingMemberProfile.objects.filter(
+            Exists(
+                models.Nomination.objects.filter(
+                    nominator=OuterRef("pk"), category__election=election
+                )
+            )
+        )
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+    last_id = 0
+    while batch := list(members.filter(pk__gt=last_id)[:batch_size]):
+        yield batch
+        last_id = batch[-1]
+
+
+@cache
+def _templates():
+    return (
+        get_template("nominate/email/nominations_for_user.txt"),
+        get_template("nominate/email/nominations_for_user.html"),
+    )
+
+
+def _members_with_nominations(election: models.Election, member_ids: list[int]):
+    nominations = (
+        models.Nomination.objects.filter(category__election=election)
+        .select_related("category")
+        .order_by("category__ballot_position", "pk")
+    )
+    return (
+        models.NominatingMemberProfile.objects.filter(pk__in=member_ids)
+        .select_related("user")
+        .prefetch_related(
+            Prefetch(
+                "nomination_set", queryset=nominations, to_attr="election_nominations"
+            )
+        )
+        .order_by("pk")
+    )
+
+
+def nomination_messages(
+    election: models.Election, member_ids: list[int], message: str | None = None
+) -> Iterator[EmailMultiAlternatives]:
+    text_template, html_template = _templates()
+
+    report_date = localize(datetime.now(UTC))
+    site_url = Site.objects.get_current().domain
+    ballot_path = reverse("election:nominate", kwargs={"election_id": election.slug})
+    from_email = svcs_from().get(ConventionConfiguration).get_hugo_help_email()
+
+    for member in _members_with_nominations(election, member_ids):
+        context = {
+            "report_date": report_date,
+            "member": member,
+            "election": election,
+            "nominations": [
+                (category, list(noms))
+                for category, noms in groupby(
+                    member.election_nominations, attrgetter("category")
+                )
+            ],
+            "ballot_url": f"https://{site_url}{ballot_path}",
+            "message": message,
+        }
+        email = EmailMultiAlternatives(
+            subject=f"Your {election} Nominations - {report_date}",
+            from_email=from_email,
+            body=text_template.render(context),
+            to=[member.user.email],
+        )
+        email.attach_alternative(html_template.render(context), "text/html")
+        yield email
+
+
+def send_in_chunks(
+    messages: Iterator[EmailMultiAlternatives], chunk_size: int = CHUNK_SIZE
+) -> MailStats:
+    stats = MailStats()
+    start = time.perf_counter()
+
+    for chunk in batched(messages, chunk_size):
+        done = 0
+        try:
+            with get_connection() as connection:
+                for email in chunk:
+                    try:
+                        if connection.send_messages([email]):
+                            stats.sent += 1
+                        else:
+                            stats.failed += 1
+                    except smtplib.SMTPRecipientsRefused as e:
+                        stats.failed += 1
+                        sentry_sdk.capture_exception(e)
+                    done += 1
+        except (smtplib.SMTPException, OSError) as e:
+            # we've lost the connection, so the rest of this chunk didn't go;
+            # the next chunk gets a fresh one.
+            stats.failed += len(chunk) - done
+            sentry_sdk.capture_exception(e)
+
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+@shared_task
+def send_nominations_batch(
+    election_id, member_ids, message=None, chunk_size=CHUNK_SIZE
+):
+    election = models.Election.objects.get(slug=election_id)
+
+    stats = send_in_chunks(
+        nomination_messages(election, member_ids, message), chunk_size
+    )
+    metrics.record_mail(stats.sent, stats.failed, stats.seconds)
+
+    logger.info(
+        f"Sent {stats.sent} of {len(member_ids)} nomination emails for {election}"
+        f" in {stats.seconds:.1f}s ({stats.failed} failed)"
+    )
+    return asdict(stats)
+
+
+@shared_task
+def send_all_nominations(
+    election_id, message=None, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE
+):
+    election = models.Election.objects.get(slug=election_id)
+
+    batches = 0
+    for member_ids in member_batches(election, batch_size):
+        send_nominations_batch.delay(election_id, member_ids, message, chunk_size)
+        batches += 1
+
+    logger.info(f"Queued {batches} batches of nomination emails for {election}")
+    return batches
@@ -0,0 +1,54 @@
+"""`markdownify` and `strip_html_tags`, remembering what they've rendered.
+
+These are drop-in replacements for the filters of the same names from
+django-markdownify and nomnom's `nomnom_filters`. The emails we send to every
+member render the same few dozen category names once per member; with these,
+each name is only turned into HTML (and back into text) once per worker.
+
+Results are kept per `MARKDOWNIFY` profile and source text, in a bounded LRU,
+and dropped whenever the `MARKDOWNIFY` setting changes.
+"""
+
+from functools import lru_cache
+
+from django import template
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.safestring import mark_safe
+from markdownify.templatetags import markdownify as upstream
+from nomnom.nominate.templatetags import nomnom_filters
+
+register = template.Library()
+
+MAX_ENTRIES = 2048
+
+
+@lru_cache(maxsize=MAX_ENTRIES)
+def render_markdown(profile: str, text: str) -> str:
+    return str(upstream.markdownify(text, custom_settings=profile))
+
+
+@lru_cache(maxsize=MAX_ENTRIES)
+def html_text(html: str) -> str:
+    return nomnom_filters.html_text(html)
+
+
+def clear() -> None:
+    render_markdown.cache_clear()
+    html_text.cache_clear()
+
+
+@receiver(setting_changed)
+def _markdownify_changed(setting, **kwargs):
+    if setting == "MARKDOWNIFY":
+        clear()
+
+
+@register.filter
+def markdownify(text, custom_settings="default"):
+    return mark_safe(render_markdown(custom_settings, str(text or "")))
+
+
+@register.filter(name="strip_html_tags")
+def strip_html_tags(html) -> str:
+    return html_text(str(html or ""))
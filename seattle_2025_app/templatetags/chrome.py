@@ -0,0 +1,114 @@
+"""Caching the site chrome: the header and navigation on every page.
+
+`bits/site-header.html` and `bits/convention_header.html` come out the same
+for everybody with the same staff flag, login state and language, so the bulk
+of them is kept in the cache:
+
+    {% chrome_fragment convention-header request.user.is_staff user.is_authenticated %}
+        ...
+    {% endchrome_fragment %}
+
+This is `{% cache %}` with two differences. The key always includes the
+active language and `chrome_version()`, so that a deploy or a change to the
+convention's configuration starts from a clean slate rather than serving the
+old chrome until it expires. And if Redis is unavailable, the fragment is
+rendered as if it weren't cached at all.
+
+Anything specific to the member (their name, the CSRF token) has to stay
+outside the fragment.
+"""
+
+import hashlib
+from functools import cache
+from importlib import metadata
+
+import redis
+import sentry_sdk
+from django import template
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache as default_cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template.loader import get_template
+from django.utils.translation import get_language
+from django_svcs.apps import svcs_from
+from nomnom.convention import ConventionConfiguration
+
+register = template.Library()
+
+CHROME_TEMPLATES = ("bits/site-header.html", "bits/convention_header.html")
+PACKAGES = ("seattle-2025", "nomnom-hugoawards")
+
+# how long a fragment lives if nothing replaces it first
+CHROME_TIMEOUT = 24 * 60 * 60
+
+
+def _package_version(name: str) -> str:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return ""
+
+
+@cache
+def chrome_version() -> str:
+    """A digest of everything the chrome is rendered from, other than the request.
+
+    That's the convention configuration, the chrome templates themselves, the
+    installed versions of this app and of nomnom, and the static files
+    manifest (which changes whenever the logo or stylesheet does). It's worked
+    out once per process; a deploy starts new ones.
+    """
+    convention = svcs_from().get(ConventionConfiguration)
+    parts = [
+        repr(convention),
+        *(get_template(name).template.source for name in CHROME_TEMPLATES),
+        *(_package_version(name) for name in PACKAGES),
+        getattr(staticfiles_storage, "manifest_hash", "") or "",
+    ]
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()[:16]
+
+
+class ChromeFragmentNode(template.Node):
+    def __init__(self, nodelist, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        vary_on = [
+            chrome_version(),
+            get_language(),
+            *(expression.resolve(context) for expression in self.vary_on),
+        ]
+        key = make_template_fragment_key(self.fragment_name, vary_on)
+
+        try:
+            value = default_cache.get(key)
+        except redis.RedisError as e:
+            sentry_sdk.capture_exception(e)
+            return self.nodelist.render(context)
+
+        if value is None:
+            value = self.nodelist.render(context)
+            try:
+                default_cache.set(key, value, CHROME_TIMEOUT)
+            except redis.RedisError as e:
+                sentry_sdk.capture_exception(e)
+
+        return value
+
+
+@register.tag("chrome_fragment")
+def do_chrome_fragment(parser, token):
+    nodelist = parser.parse(("endchrome_fragment",))
+    parser.delete_first_token()
+
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least a fragment name."
+        )
+
+    return ChromeFragmentNode(
+        nodelist, bits[1], [parser.compile_filter(bit) for bit in bits[2:]]
+    )
@@ -1,13 +1,28 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import jwt
 import pytest
+from asgiref.sync import async_to_sync
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.db import connection
 from django.http import HttpRequest
+from django.test.utils import CaptureQueriesContext
 from faker import Faker
 from nomnom.nominate.models import NominatingMemberProfile
 
-from seattle_2025_app.auth import ControllBackend, create_member, create_username
+from seattle_2025_app.auth import (
+    ControllBackend,
+    ControllToken,
+    create_member,
+    create_username,
+    decode_token,
+    update_wsfs_permissions,
+    wsfs_groups,
+)
 from seattle_2025_app.models import ControllPerson
 
 EXISTING_PERID = 42
@@ -69,6 +84,37 @@ def test_authenticate_updates_perid_with_newperid(
     assert person.newperid == ONLY_NEWPERID  # Should remain unchanged
 
 
+def test_aauthenticate_matches_the_sync_path(
+    db, user_factory, controll_person_factory, backend, convention
+):
+    user = user_factory()
+    controll_person_factory(user=user, perid=EXISTING_PERID)
+    token = ControllToken(
+        claims={"perid": EXISTING_PERID, "rights": "hugo_vote"}, expired=False
+    )
+
+    # first from the database, then from the identity cache
+    assert async_to_sync(backend.aauthenticate)(None, token=token) == user
+    assert async_to_sync(backend.aauthenticate)(None, token=token) == user
+
+    assert list(user.groups.values_list("name", flat=True)) == [convention.voting_group]
+
+
+def test_aauthenticate_updates_perid_with_newperid(
+    db, user_factory, controll_person_factory, backend
+):
+    user = user_factory()
+    person = controll_person_factory(user=user, newperid=ONLY_NEWPERID)
+    token = ControllToken(
+        claims={"perid": UPDATED_PERID, "newperid": ONLY_NEWPERID}, expired=False
+    )
+
+    assert async_to_sync(backend.aauthenticate)(None, token=token) == user
+
+    person.refresh_from_db()
+    assert person.perid == UPDATED_PERID
+
+
 def test_authenticate_updates_member_id_when_updating_perid(
     db, user_factory, controll_person_factory, backend
 ):
@@ -149,6 +195,160 @@ def test_authenticate_by_newperid_updates_wsfs_rights(
     )
 
 
+def test_authenticate_returning_member_resolves_in_one_query(
+    db,
+    user_factory,
+    controll_person_factory,
+    backend,
+    convention,
+    django_assert_num_queries,
+):
+    user = user_factory(with_convention_profile=True)
+    user.groups.add(wsfs_groups(convention)["hugo_nominate"])
+    controll_person_factory(
+        user=user, perid=EXISTING_PERID, applied_rights="hugo_nominate"
+    )
+
+    token = ControllToken(
+        claims={"perid": EXISTING_PERID, "rights": "hugo_nominate"}, expired=False
+    )
+
+    # the rights are what we applied last time, so the groups aren't touched
+    with django_assert_num_queries(1):
+        authenticated_user = backend.authenticate(None, token=token)
+        assert authenticated_user.convention_profile is not None
+
+    assert authenticated_user == user
+
+
+def test_authenticate_returning_member_opens_no_transaction(
+    db, user_factory, controll_person_factory, backend
+):
+    user = user_factory()
+    controll_person_factory(user=user, perid=EXISTING_PERID, applied_rights="")
+    token = ControllToken(claims={"perid": EXISTING_PERID}, expired=False)
+
+    # the test itself runs in a transaction, so any atomic block in the login
+    # shows up as a savepoint.
+    with CaptureQueriesContext(connection) as queries:
+        assert backend.authenticate(None, token=token) == user
+
+    assert not any("SAVEPOINT" in query["sql"] for query in queries)
+
+
+def test_authenticate_changed_rights_are_synced_and_recorded(
+    db, user_factory, controll_person_factory, backend, convention
+):
+    user = user_factory()
+    user.groups.add(wsfs_groups(convention)["hugo_nominate"])
+    person = controll_person_factory(
+        user=user, perid=EXISTING_PERID, applied_rights="hugo_nominate"
+    )
+
+    token = ControllToken(
+        claims={"perid": EXISTING_PERID, "rights": "hugo_vote,hugo_nominate"},
+        expired=False,
+    )
+    backend.authenticate(None, token=token)
+
+    person.refresh_from_db()
+    assert person.applied_rights == "hugo_nominate,hugo_vote"
+    assert set(user.groups.values_list("name", flat=True)) == {
+        convention.nominating_group,
+        convention.voting_group,
+    }
+
+
+def test_hand_edited_groups_are_synced_on_next_login(
+    db, user_factory, controll_person_factory, backend, convention
+):
+    user = user_factory()
+    person = controll_person_factory(
+        user=user, perid=EXISTING_PERID, applied_rights="hugo_nominate"
+    )
+    # recorded as applied, but an admin has since taken the group away
+    user.groups.remove(wsfs_groups(convention)["hugo_nominate"])
+    person.refresh_from_db()
+    assert person.applied_rights is None
+
+    token = ControllToken(
+        claims={"perid": EXISTING_PERID, "rights": "hugo_nominate"}, expired=False
+    )
+    backend.authenticate(None, token=token)
+
+    assert list(user.groups.values_list("name", flat=True)) == [
+        convention.nominating_group
+    ]
+
+
+def test_authenticate_returning_member_uses_identity_cache(
+    db, user_factory, controll_person_factory, backend
+):
+    user = user_factory()
+    controll_person_factory(user=user, perid=EXISTING_PERID)
+    token = ControllToken(claims={"perid": EXISTING_PERID}, expired=False)
+
+    assert backend.authenticate(None, token=token) == user
+
+    with CaptureQueriesContext(connection) as queries:
+        assert backend.authenticate(None, token=token) == user
+
+    assert not any(ControllPerson._meta.db_table in query["sql"] for query in queries)
+
+
+def test_identity_cache_is_dropped_when_person_is_deleted(
+    db, user_factory, controll_person_factory, backend
+):
+    user = user_factory()
+    person = controll_person_factory(user=user, perid=EXISTING_PERID)
+    token = ControllToken(claims={"perid": EXISTING_PERID}, expired=False)
+
+    assert backend.authenticate(None, token=token) == user
+
+    person.delete()
+
+    assert backend.authenticate(None, token=token) is None
+
+
+def test_identity_cache_is_dropped_when_perid_is_changed(
+    db, user_factory, controll_person_factory, backend
+):
+    user = user_factory()
+    controll_person_factory(user=user, perid=EXISTING_PERID)
+    token = ControllToken(claims={"perid": EXISTING_PERID}, expired=False)
+
+    assert backend.authenticate(None, token=token) == user
+
+    # as the admin would: load the person, then save them with a new perid
+    person = ControllPerson.objects.get(user=user)
+    person.perid = UPDATED_PERID
+    person.save()
+
+    assert backend.authenticate(None, token=token) is None
+
+
+def test_authenticate_prefers_perid_match_over_newperid(
+    db, user_factory, controll_person_factory, backend
+):
+    perid_user = user_factory()
+    controll_person_factory(user=perid_user, perid=EXISTING_PERID)
+    newperid_user = user_factory()
+    newperid_person = controll_person_factory(
+        user=newperid_user, newperid=EXISTING_NEWPERID
+    )
+
+    token = jwt.encode(
+        {"perid": EXISTING_PERID, "newperid": EXISTING_NEWPERID},
+        settings.CONTROLL_JWT_KEY,
+        algorithm="HS256",
+    )
+
+    assert backend.authenticate(None, token=token) == perid_user
+
+    newperid_person.refresh_from_db()
+    assert newperid_person.perid is None
+
+
 def test_authenticate_doesnt_create_new_row_for_perid(db, backend):
     # Mock a token with an unrecognized perid
     token = jwt.encode(
@@ -207,6 +407,48 @@ def test_invalid_token_handling(db, backend):
     assert authenticated_user is None  # Should return None for invalid tokens
 
 
+def test_decode_token_records_expiry_without_rejecting():
+    token = jwt.encode(
+        {"perid": EXISTING_PERID, "exp": 1737541662},
+        settings.CONTROLL_JWT_KEY,
+        algorithm="HS256",
+    )
+
+    verified = decode_token(token)
+
+    assert verified is not None
+    assert verified.expired
+    assert verified.perid == EXISTING_PERID
+
+
+def test_decode_token_without_expiry_is_not_expired():
+    token = jwt.encode(
+        {"perid": EXISTING_PERID}, settings.CONTROLL_JWT_KEY, algorithm="HS256"
+    )
+
+    verified = decode_token(token)
+
+    assert verified is not None
+    assert not verified.expired
+
+
+def test_decode_token_rejects_bad_signature():
+    token = jwt.encode({"perid": EXISTING_PERID}, "not the key", algorithm="HS256")
+
+    assert decode_token(token) is None
+
+
+def test_authenticate_with_verified_token(
+    db, user_factory, controll_person_factory, backend
+):
+    user = user_factory()
+    controll_person_factory(user=user, perid=EXISTING_PERID)
+
+    verified = ControllToken(claims={"perid": EXISTING_PERID}, expired=True)
+
+    assert backend.authenticate(None, token=verified) == user
+
+
 @pytest.fixture(name="http_request")
 def make_request():
     # generate a fake Django request object
@@ -217,15 +459,18 @@ def make_request():
 
 @pytest.fixture(name="decoded_token")
 def make_decoded_token():
-    return {
-        "perid": EXISTING_PERID,
-        "newperid": NEW_PERID,
-        "email": Faker().email(),
-        "rights": "hugo_nominate",
-        "fullName": Faker().name(),
-        "first_name": Faker().first_name(),
-        "last_name": Faker().last_name(),
-    }
+    return ControllToken(
+        claims={
+            "perid": EXISTING_PERID,
+            "newperid": NEW_PERID,
+            "email": Faker().email(),
+            "rights": "hugo_nominate",
+            "fullName": Faker().name(),
+            "first_name": Faker().first_name(),
+            "last_name": Faker().last_name(),
+        },
+        expired=False,
+    )
 
 
 def test_create_member_with_no_existing_user(db, http_request, decoded_token):
@@ -233,11 +478,11 @@ def test_create_member_with_no_existing_user(db, http_request, decoded_token):
     assert member is not None
 
     assert member.user.username == create_username(
-        decoded_token["perid"], decoded_token["newperid"]
+        decoded_token.claims["perid"], decoded_token.claims["newperid"]
     )
-    assert member.user.email == decoded_token["email"]
-    assert member.user.controll_person.perid == decoded_token["perid"]
-    assert member.user.controll_person.newperid == decoded_token["newperid"]
+    assert member.user.email == decoded_token.claims["email"]
+    assert member.user.controll_person.perid == decoded_token.claims["perid"]
+    assert member.user.controll_person.newperid == decoded_token.claims["newperid"]
 
 
 def test_create_member_with_no_existing_user_sets_rights(
@@ -258,16 +503,39 @@ def test_create_member_with_existing_user(db, http_request, decoded_token):
     UserModel = get_user_model()
 
     existing_user = UserModel.objects.create(
-        username=create_username(decoded_token["perid"], decoded_token["newperid"]),
-        email=decoded_token["email"],
+        username=create_username(
+            decoded_token.claims["perid"], decoded_token.claims["newperid"]
+        ),
+        email=decoded_token.claims["email"],
+        is_staff=True,
     )
+    existing_user.set_password("correct horse battery staple")
+    existing_user.save()
 
     member: NominatingMemberProfile | None = create_member(http_request, decoded_token)
     assert member is not None
 
     assert member.user == existing_user
-    assert member.user.controll_person.perid == decoded_token["perid"]
-    assert member.user.controll_person.newperid == decoded_token["newperid"]
+    assert member.user.controll_person.perid == decoded_token.claims["perid"]
+    assert member.user.controll_person.newperid == decoded_token.claims["newperid"]
+    # what the session will be checked against
+    assert member.user.password == existing_user.password
+    assert member.user.get_session_auth_hash() == existing_user.get_session_auth_hash()
+    assert member.user.is_staff
+
+
+def test_create_member_finds_the_person_who_already_has_the_perid(
+    db, http_request, decoded_token, user_factory, controll_person_factory
+):
+    # a concurrent login that knew them by another username got there first
+    owner = user_factory(with_convention_profile=True)
+    controll_person_factory(owner, perid=decoded_token.claims["perid"])
+
+    member = create_member(http_request, decoded_token)
+
+    assert member is not None
+    assert member.user == owner
+    assert ControllPerson.objects.count() == 1
 
 
 def test_create_member_with_existing_user_updates_rights(
@@ -276,8 +544,10 @@ def test_create_member_with_existing_user_updates_rights(
     UserModel = get_user_model()
 
     existing_user = UserModel.objects.create(
-        username=create_username(decoded_token["perid"], decoded_token["newperid"]),
-        email=decoded_token["email"],
+        username=create_username(
+            decoded_token.claims["perid"], decoded_token.claims["newperid"]
+        ),
+        email=decoded_token.claims["email"],
     )
     existing_user.groups.add(Group.objects.get(name=convention.voting_group))
     existing_user.groups.add(Group.objects.get(name=convention.nominating_group))
@@ -291,3 +561,122 @@ def test_create_member_with_existing_user_updates_rights(
     assert convention.voting_group not in member.user.groups.values_list(
         "name", flat=True
     )
+
+
+def test_create_member_takes_a_fixed_number_of_queries(
+    db, http_request, decoded_token, convention, django_assert_num_queries
+):
+    wsfs_groups(convention)
+
+    # savepoint; upsert the user and person; read the person back; upsert the
+    # profile; read and write the memberships; record the rights; release.
+    with django_assert_num_queries(9):
+        create_member(http_request, decoded_token)
+
+
+@pytest.fixture
+def restore_seed_data(django_db_blocker):
+    # transactional tests empty every table afterwards, taking the groups
+    # loaded in `django_db_setup` with them.
+    yield
+    with django_db_blocker.unblock():
+        call_command("loaddata", "all/0001-permissions.json")
+
+
+def test_concurrent_first_logins_create_one_member(
+    restore_seed_data, transactional_db, http_request, decoded_token
+):
+    attempts = 8
+    barrier = threading.Barrier(attempts)
+
+    def first_login():
+        try:
+            barrier.wait()
+            return create_member(http_request, decoded_token).user_id
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=attempts) as executor:
+        user_ids = list(executor.map(lambda _: first_login(), range(attempts)))
+
+    assert len(set(user_ids)) == 1
+    assert get_user_model().objects.count() == 1
+    assert ControllPerson.objects.count() == 1
+    assert NominatingMemberProfile.objects.count() == 1
+
+
+def test_wsfs_groups_are_cached(db, convention, django_assert_num_queries):
+    groups = wsfs_groups(convention)
+
+    with django_assert_num_queries(0):
+        assert wsfs_groups(convention) == groups
+
+    assert groups["hugo_nominate"].name == convention.nominating_group
+    assert groups["hugo_vote"].name == convention.voting_group
+
+
+def test_wsfs_groups_cache_is_dropped_when_a_group_changes(
+    db, convention, django_assert_num_queries
+):
+    groups = wsfs_groups(convention)
+
+    group = Group.objects.get(name=convention.voting_group)
+    group.save()
+
+    with django_assert_num_queries(1):
+        assert wsfs_groups(convention) == groups
+
+
+def test_update_wsfs_permissions_writes_only_the_difference(
+    db, http_request, user_factory, convention, django_assert_num_queries
+):
+    user = user_factory()
+    groups = wsfs_groups(convention)
+    user.groups.add(groups["hugo_vote"])
+
+    # one read of the current memberships, one insert
+    with django_assert_num_queries(2):
+        assert update_wsfs_permissions(
+            http_request, ["hugo_nominate", "hugo_vote"], user
+        )
+
+    assert set(user.groups.values_list("name", flat=True)) == {
+        convention.nominating_group,
+        convention.voting_group,
+    }
+
+
+def test_update_wsfs_permissions_without_changes_only_reads(
+    db, http_request, user_factory, convention, django_assert_num_queries
+):
+    user = user_factory()
+    groups = wsfs_groups(convention)
+    user.groups.add(groups["hugo_nominate"])
+
+    with django_assert_num_queries(1):
+        assert not update_wsfs_permissions(http_request, ["hugo_nominate"], user)
+
+
+def test_update_wsfs_permissions_removes_rights(
+    db, http_request, user_factory, convention
+):
+    user = user_factory()
+    groups = wsfs_groups(convention)
+    user.groups.add(groups["hugo_nominate"], groups["hugo_vote"])
+
+    assert update_wsfs_permissions(http_request, ["hugo_vote"], user)
+
+    assert list(user.groups.values_list("name", flat=True)) == [convention.voting_group]
+
+
+def test_update_wsfs_permissions_refreshes_prefetched_groups(
+    db, http_request, user_factory, convention
+):
+    user = user_factory()
+    groups = wsfs_groups(convention)
+    user.groups.add(groups["hugo_nominate"])
+    user = get_user_model().objects.prefetch_related("groups").get(pk=user.pk)
+
+    assert update_wsfs_permissions(http_request, ["hugo_vote"], user)
+
+    assert [group.name for group in user.groups.all()] == [convention.voting_group]
@@ -0,0 +1,40 @@
+import jwt
+import pytest
+from django.conf import settings
+
+from seattle_2025_app import benchmark
+from seattle_2025_app.auth import ControllBackend
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+
+    assert benchmark.percentile(values, 50) == 50
+    assert benchmark.percentile(values, 95) == 95
+    assert benchmark.percentile(values, 99) == 99
+    assert benchmark.percentile([], 99) == 0.0
+
+
+def test_minted_token_matches_login_link_shape():
+    token = benchmark.mint_token(
+        42, None, first_name="Chris", last_name="Rose", email="worldcon@example.com"
+    )
+
+    payload = jwt.decode(token, settings.CONTROLL_JWT_KEY, algorithms=["HS512"])
+
+    assert payload["perid"] == 42
+    assert payload["newperid"] is None
+    assert payload["fullName"] == "Chris Rose"
+    assert payload["rights"] == "hugo_nominate,hugo_vote"
+
+
+@pytest.mark.django_db
+def test_minted_token_authenticates(user_factory, controll_person_factory):
+    user = user_factory()
+    controll_person_factory(user=user, perid=42)
+
+    token = benchmark.mint_token(
+        42, None, first_name="Chris", last_name="Rose", email="worldcon@example.com"
+    )
+
+    assert ControllBackend().authenticate(None, token=token) == user
@@ -0,0 +1,72 @@
+import pytest
+from django.template import engines
+from markdownify.templatetags.markdownify import markdownify
+from nomnom.nominate.templatetags.nomnom_filters import html_text
+
+from seattle_2025_app.management.commands import bench_email_render
+from seattle_2025_app.templatetags import cached_markdown
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    cached_markdown.clear()
+
+
+def render(source, **context):
+    return engines["django"].from_string(source).render(context)
+
+
+@pytest.mark.parametrize("profile", ["default", "admin-label"])
+def test_matches_upstream(profile):
+    text = "Best *Novel* ~~ever~~ <script>alert(1)</script>"
+
+    rendered = render(
+        "{% load cached_markdown %}{{ text|markdownify:profile }}",
+        text=text,
+        profile=profile,
+    )
+
+    assert rendered == markdownify(text, profile)
+
+
+def test_strip_html_tags_matches_upstream():
+    rendered = render(
+        "{% load cached_markdown %}{{ text|markdownify|strip_html_tags }}",
+        text="Best *Novel*",
+    )
+
+    assert rendered == html_text(markdownify("Best *Novel*"))
+
+
+def test_repeated_text_is_rendered_once():
+    for _ in range(3):
+        render(
+            "{% load cached_markdown %}{{ text|markdownify }}{{ text|markdownify:'admin-label' }}",
+            text="Best *Novel*",
+        )
+
+    info = cached_markdown.render_markdown.cache_info()
+    assert (info.misses, info.hits) == (2, 4)
+
+
+def test_changing_markdownify_settings_clears_the_cache(settings):
+    render("{% load cached_markdown %}{{ 'Best *Novel*'|markdownify }}")
+
+    settings.MARKDOWNIFY = {"default": {"WHITELIST_TAGS": set()}}
+
+    assert cached_markdown.render_markdown.cache_info().currsize == 0
+    assert render("{% load cached_markdown %}{{ 'Best *Novel*'|markdownify }}") == (
+        "Best Novel"
+    )
+
+
+def test_emails_render_the_same_as_upstream():
+    context = bench_email_render.sample_context(None, categories=3)
+
+    upstream = [t.render(context) for t in bench_email_render.upstream_templates()]
+    cached = [
+        engines["django"].get_template(name).render(context)
+        for name in bench_email_render.TEMPLATES
+    ]
+
+    assert cached == upstream
@@ -0,0 +1,17 @@
+import re
+
+from seattle_2025_app.management.commands.caddy_static import HASHED_NAME, caddy_block
+
+
+def test_caddy_block():
+    block = caddy_block("/srv/static", "static/")
+
+    assert "handle_path /static/* {" in block
+    assert "root * /srv/static" in block
+    assert "precompressed br gzip" in block
+
+
+def test_hashed_names():
+    assert re.search(HASHED_NAME, "/css/seattle-2025.3f2a9c0d1b7e.css")
+    assert not re.search(HASHED_NAME, "/css/seattle-2025.css")
+    assert not re.search(HASHED_NAME, "/css/seattle-2025.3f2a9c0d1b7e.css.gz/x")
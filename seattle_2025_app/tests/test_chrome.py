@@ -0,0 +1,88 @@
+import pytest
+import redis
+
+from seattle_2025_app.templatetags import chrome
+
+
+@pytest.fixture(autouse=True)
+def fresh_version():
+    chrome.chrome_version.cache_clear()
+    yield
+    chrome.chrome_version.cache_clear()
+
+
+@pytest.fixture
+def fragment_writes(monkeypatch):
+    writes = []
+    set_ = chrome.default_cache.set
+
+    def recording_set(key, value, timeout):
+        if "convention-header" in key:
+            writes.append(key)
+        return set_(key, value, timeout)
+
+    monkeypatch.setattr(chrome.default_cache, "set", recording_set)
+    return writes
+
+
+def page(client, user=None):
+    if user is not None:
+        client.force_login(user)
+    else:
+        client.logout()
+    return client.get("/").content.decode()
+
+
+def test_chrome_varies_by_staff_and_login(db, client, user_factory):
+    member = user_factory()
+    staff = user_factory(is_staff=True)
+
+    anonymous = page(client)
+    as_member = page(client, member)
+    as_staff = page(client, staff)
+
+    assert "Hugo Awards</a>" not in anonymous
+    assert "Hugo Awards</a>" in as_member
+    assert "Admin Dashboard" not in as_member
+    assert "Admin Dashboard" in as_staff
+
+
+def test_member_specific_parts_are_not_cached(db, client, user_factory):
+    page(client, user_factory(email="ada@example.com"))
+    rendered = page(client, user_factory(email="grace@example.com"))
+
+    assert "Sign Out grace@example.com" in rendered
+    assert "ada@example.com" not in rendered
+    assert "csrfmiddlewaretoken" in rendered
+
+
+def test_fragments_are_reused(db, client, user_factory, fragment_writes):
+    member = user_factory()
+
+    page(client, member)
+    page(client, member)
+    page(client, user_factory())
+
+    # rendered once, for every member who isn't staff
+    assert len(fragment_writes) == 1
+
+
+def test_a_new_version_renders_afresh(
+    db, client, user_factory, fragment_writes, monkeypatch
+):
+    member = user_factory()
+    page(client, member)
+
+    monkeypatch.setattr(chrome, "chrome_version", lambda: "a new deploy")
+    page(client, member)
+
+    assert len(set(fragment_writes)) == 2
+
+
+def test_redis_errors_render_uncached(db, client, user_factory, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise redis.ConnectionError("no redis today")
+
+    monkeypatch.setattr(chrome.default_cache, "get", unavailable)
+
+    assert "Hugo Awards</a>" in page(client, user_factory())
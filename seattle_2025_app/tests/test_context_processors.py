@@ -0,0 +1,57 @@
+import pytest
+from django.contrib.auth.forms import AuthenticationForm
+from django.template import engines
+from nomnom.nominate import context_processors as upstream
+from nomnom.nominate.models import AdminMessage
+
+from seattle_2025_app import context_processors
+
+
+def resolved(context):
+    return {
+        key: value() if callable(value) else value for key, value in context.items()
+    }
+
+
+def render(source, context):
+    return engines["django"].from_string(source).render(context)
+
+
+@pytest.fixture
+def admin_message(db):
+    return AdminMessage.objects.create(message="Ballots close *soon*", active=True)
+
+
+def test_site_matches_upstream(rf, admin_message):
+    request = rf.get("/")
+
+    assert resolved(context_processors.site(request)) == upstream.site(request)
+
+
+def test_nothing_is_looked_up_until_used(rf, admin_message, django_assert_num_queries):
+    context = context_processors.site(rf.get("/"))
+
+    with django_assert_num_queries(0):
+        render("{{ CONVENTION_NAME }}", context)
+
+    with django_assert_num_queries(1):
+        rendered = render(
+            "{% if ADMIN_MESSAGE %}{{ ADMIN_MESSAGE }}{% endif %}{{ ADMIN_MESSAGE }}",
+            context,
+        )
+
+    assert rendered == "Ballots close *soon*" * 2
+
+
+def test_login_form(rf, settings):
+    settings.NOMNOM_ALLOW_USERNAME_LOGIN_FOR_MEMBERS = True
+    context = context_processors.inject_login_form(rf.get("/"))
+
+    assert isinstance(context["form"](), AuthenticationForm)
+    assert context["form"]() is context["form"]()
+
+
+def test_no_login_form_without_username_login(rf, settings):
+    settings.NOMNOM_ALLOW_USERNAME_LOGIN_FOR_MEMBERS = False
+
+    assert context_processors.inject_login_form(rf.get("/")) == {}
@@ -0,0 +1,93 @@
+import io
+
+from django.contrib.auth import get_user_model
+
+from seattle_2025_app.auth import create_username
+from seattle_2025_app.management.commands.import_controll_members import (
+    import_members,
+    read_export,
+)
+from seattle_2025_app.models import ControllPerson
+
+EXPORT_CSV = """\
+perid,newperid,email,first_name,last_name,fullName,rights
+5001,,ada@example.com,Ada,Lovelace,Ada Lovelace,"hugo_nominate,hugo_vote"
+,6001,grace@example.com,Grace,Hopper,,hugo_vote
+,,nobody@example.com,No,Body,,hugo_vote
+"""
+
+
+def records():
+    return list(read_export(io.StringIO(EXPORT_CSV), "csv"))
+
+
+def test_import_creates_members(db, convention):
+    result = import_members(records(), convention, batch_size=2)
+
+    assert (result.rows, result.created, result.existing, result.invalid) == (
+        3,
+        2,
+        0,
+        1,
+    )
+
+    ada = get_user_model().objects.get(username=create_username("5001", None))
+    assert ada.controll_person.perid == 5001
+    assert ada.controll_person.applied_rights == "hugo_nominate,hugo_vote"
+    assert ada.convention_profile.member_number == "5001"
+    assert set(ada.groups.values_list("name", flat=True)) == {
+        convention.nominating_group,
+        convention.voting_group,
+    }
+
+    grace = get_user_model().objects.get(username=create_username(None, "6001"))
+    assert grace.convention_profile.preferred_name == "Grace Hopper"
+    assert list(grace.groups.values_list("name", flat=True)) == [
+        convention.voting_group
+    ]
+
+
+def test_import_is_idempotent(db, convention):
+    import_members(records(), convention)
+    result = import_members(records(), convention)
+
+    assert (result.created, result.existing) == (0, 2)
+    assert ControllPerson.objects.count() == 2
+
+
+def test_import_completes_a_user_without_a_person(db, convention, user_factory):
+    user = user_factory(username=create_username("5001", None))
+
+    import_members(records(), convention)
+
+    user.refresh_from_db()
+    assert user.controll_person.perid == 5001
+    # we don't know what groups they already had; their next login syncs them
+    assert user.controll_person.applied_rights is None
+
+
+def test_import_skips_a_second_record_with_the_same_perid(db, convention):
+    export = [
+        {"perid": "5001", "email": "ada@example.com", "rights": "hugo_vote"},
+        {"perid": "5001", "newperid": "7", "email": "ada@example.com"},
+    ]
+
+    result = import_members(export, convention)
+
+    assert (result.created, result.existing) == (1, 1)
+    assert (
+        not get_user_model()
+        .objects.filter(username=create_username("5001", "7"))
+        .exists()
+    )
+    assert ControllPerson.objects.get().newperid is None
+
+
+def test_read_export_jsonl():
+    stream = io.StringIO(
+        '{"perid": 5001, "rights": "hugo_vote"}\n\n{"newperid": 6001}\n'
+    )
+    assert list(read_export(stream, "jsonl")) == [
+        {"perid": 5001, "rights": "hugo_vote"},
+        {"newperid": 6001},
+    ]
@@ -0,0 +1,65 @@
+import pytest
+
+from seattle_2025_app import benchmark, metrics
+
+
+def test_count_queries_nests(db, django_user_model):
+    with metrics.count_queries() as outer:
+        django_user_model.objects.count()
+        with metrics.count_queries() as inner:
+            django_user_model.objects.count()
+
+    assert (outer.queries, inner.queries) == (2, 1)
+
+
+def test_render_accumulates_buckets():
+    store = metrics.LocalStore()
+    for total_time in (0.003, 0.04, 20.0):
+        store.add(
+            *metrics._fields(
+                metrics.LoginMeasurement(outcome="returning", total_time=total_time)
+            )
+        )
+
+    rendered = metrics.render(store.snapshot())
+
+    assert 'controll_logins_total{outcome="returning"} 3' in rendered
+    assert 'controll_logins_total{outcome="created"} 0' in rendered
+    assert (
+        'controll_login_duration_seconds_bucket{outcome="returning",le="0.005"} 1'
+        in rendered
+    )
+    assert (
+        'controll_login_duration_seconds_bucket{outcome="returning",le="0.05"} 2'
+        in rendered
+    )
+    assert (
+        'controll_login_duration_seconds_bucket{outcome="returning",le="+Inf"} 3'
+        in rendered
+    )
+    assert 'controll_login_duration_seconds_count{outcome="returning"} 3' in rendered
+
+
+@pytest.mark.django_db
+def test_logins_are_recorded_by_outcome(client):
+    token = benchmark.mint_token(
+        4242, None, first_name="Chris", last_name="Rose", email="c@example.com"
+    )
+
+    client.get("/controll-redirect/", {"r": token})
+    client.logout()
+    client.get("/controll-redirect/", {"r": "not a token"})
+
+    values = metrics.store().snapshot()
+    assert values["controll_logins_total|created"] == 1
+    assert values["controll_logins_total|rejected"] == 1
+    assert values["controll_login_queries|created|sum"] > 0
+
+
+@pytest.mark.django_db
+def test_login_metrics_endpoint(client):
+    response = client.get("/_metrics/logins")
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert b"# TYPE controll_logins_total counter" in response.content
@@ -0,0 +1,33 @@
+from seattle_2025_app.management.commands.profile_startup import (
+    by_package,
+    parse_importtime,
+)
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       276 |        276 |   _io
+import time:       120 |        120 |       django.utils.version
+import time:       300 |        420 |     django.utils
+import time:       500 |        920 |   django
+some other output
+"""
+
+
+def test_parse_importtime():
+    costs = parse_importtime(IMPORTTIME.splitlines())
+
+    assert [(c.module, c.self_us, c.cumulative_us) for c in costs] == [
+        ("_io", 276, 276),
+        ("django.utils.version", 120, 120),
+        ("django.utils", 300, 420),
+        ("django", 500, 920),
+    ]
+
+
+def test_by_package_sums_self_time():
+    packages = {
+        c.module: c for c in by_package(parse_importtime(IMPORTTIME.splitlines()))
+    }
+
+    assert (packages["django"].self_us, packages["django"].cumulative_us) == (920, 920)
+    assert packages["_io"].self_us == 276
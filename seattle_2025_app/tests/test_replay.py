@@ -0,0 +1,65 @@
+import pytest
+
+from seattle_2025_app import replay
+
+
+def test_lru_cache_evicts_least_recently_used():
+    lru = replay.LRUCache(max_entries=2, timeout=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+
+    assert lru.get("a") == 1  # a is now the most recently used
+
+    lru.set("c", 3)
+
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+    assert lru.get("c") == 3
+
+
+def test_lru_cache_expires_entries():
+    lru = replay.LRUCache(max_entries=2, timeout=0)
+    lru.set("a", 1)
+
+    assert lru.get("a") is None
+    assert len(lru) == 0
+
+
+def test_remembered_token_is_found_from_the_shared_cache():
+    replay.remember("a.token.value", 12)
+    replay.clear_local()
+
+    replayed = replay.lookup("a.token.value")
+
+    assert replayed == replay.ReplayedLogin(user_id=12)
+    assert replay.lookup("another.token.value") is None
+
+
+@pytest.mark.django_db
+def test_repeated_token_only_logs_in(
+    client, monkeypatch, django_capture_on_commit_callbacks
+):
+    from django.contrib.auth import get_user
+
+    from seattle_2025_app import benchmark, views
+
+    token = benchmark.mint_token(
+        4242, None, first_name="Chris", last_name="Rose", email="c@example.com"
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.get("/controll-redirect/", {"r": token})
+    assert response.status_code == 302
+    user = get_user(client)
+
+    client.logout()
+
+    def decode_token(token):
+        raise AssertionError("a replayed token should not be decoded again")
+
+    monkeypatch.setattr(views, "decode_token", decode_token)
+
+    response = client.get("/controll-redirect/", {"r": token})
+
+    assert response.status_code == 302
+    assert get_user(client) == user
@@ -0,0 +1,30 @@
+import pytest
+from django.contrib.sessions.backends.cache import SessionStore as CacheSessionStore
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+def test_migrate_sessions_copies_live_sessions_into_the_cache():
+    session = DBSessionStore()
+    session["member"] = "Chris"
+    session.save()
+
+    call_command("migrate_sessions", "--engine", "cache")
+
+    assert CacheSessionStore(session.session_key).load() == {"member": "Chris"}
+
+
+@pytest.mark.django_db
+def test_migrate_sessions_leaves_newer_cached_sessions_alone():
+    session = DBSessionStore()
+    session["member"] = "Chris"
+    session.save()
+
+    cached = CacheSessionStore(session.session_key)
+    cached.update({"member": "Chris", "voted": True})
+    cached.save()
+
+    call_command("migrate_sessions", "--engine", "cache")
+
+    assert CacheSessionStore(session.session_key).load()["voted"] is True
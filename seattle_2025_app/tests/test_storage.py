@@ -0,0 +1,36 @@
+import re
+
+from django.core.management import call_command
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+HASHED_STYLESHEET = re.compile(r'/static/[^"]+\.[0-9a-f]{12}\.css"')
+
+
+def test_pages_render_against_the_collected_manifest(
+    db, client, settings, tmp_path, user_factory
+):
+    settings.STATIC_ROOT = tmp_path
+    settings.STORAGES = settings.STORAGES | {
+        "staticfiles": {
+            "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"
+        }
+    }
+    call_command("collectstatic", interactive=False, verbosity=0)
+
+    anonymous = client.get("/")
+    failed_login = client.get("/controll-redirect/", {"r": "not a token"})
+    client.force_login(user_factory())
+    member = client.get("/")
+
+    for response, status in ((anonymous, 200), (failed_login, 403), (member, 200)):
+        assert response.status_code == status
+        assert HASHED_STYLESHEET.search(response.content.decode())
+
+
+def test_files_missing_from_the_manifest_are_hashed_on_the_spot(tmp_path):
+    (tmp_path / "late.css").write_text("body {}")
+    storage = CompressedManifestStaticFilesStorage(
+        location=tmp_path, base_url="/static/"
+    )
+
+    assert re.fullmatch(r"/static/late\.[0-9a-f]{12}\.css", storage.url("late.css"))
@@ -0,0 +1,74 @@
+import smtplib
+
+from django.core import mail
+from nomnom.nominate.factories import (
+    CategoryFactory,
+    ElectionFactory,
+    NominatingMemberProfileFactory,
+    NominationFactory,
+)
+
+from seattle_2025_app import metrics, tasks
+
+
+def nominators(election, count):
+    categories = CategoryFactory.create_batch(2, election=election)
+    members = NominatingMemberProfileFactory.create_batch(count)
+    for member in members:
+        for category in categories:
+            NominationFactory(nominator=member, category=category)
+    return members
+
+
+def test_member_batches_page_by_id(db):
+    election = ElectionFactory()
+    members = nominators(election, 5)
+    # nominating elsewhere doesn't count
+    NominationFactory()
+
+    batches = list(tasks.member_batches(election, batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert sum(batches, []) == sorted(member.pk for member in members)
+
+
+def test_send_nominations_batch(db, django_assert_max_num_queries):
+    election = ElectionFactory()
+    members = nominators(election, 3)
+
+    # the election, the site, the members with their users, and their nominations
+    with django_assert_max_num_queries(4):
+        stats = tasks.send_nominations_batch(
+            election.slug, [m.pk for m in members], "Hello!", chunk_size=2
+        )
+
+    assert stats["sent"] == 3
+    assert stats["failed"] == 0
+    assert sorted(m.to[0] for m in mail.outbox) == sorted(m.user.email for m in members)
+    assert "Hello!" in mail.outbox[0].body
+
+    values = metrics.store().snapshot()
+    assert values[metrics.MAIL_SENT] == 3
+    assert values[metrics.MAIL_FAILED] == 0
+
+
+def test_refused_recipients_are_counted(db, monkeypatch):
+    election = ElectionFactory()
+    members = nominators(election, 3)
+    refused = members[1].user.email
+
+    from django.core.mail.backends.locmem import EmailBackend
+
+    send_messages = EmailBackend.send_messages
+
+    def refusing(self, messages):
+        if messages[0].to == [refused]:
+            raise smtplib.SMTPRecipientsRefused({refused: (550, b"no such user")})
+        return send_messages(self, messages)
+
+    monkeypatch.setattr(EmailBackend, "send_messages", refusing)
+
+    stats = tasks.send_nominations_batch(election.slug, [m.pk for m in members])
+
+    assert (stats["sent"], stats["failed"]) == (2, 1)
+    assert refused not in {m.to[0] for m in mail.outbox}
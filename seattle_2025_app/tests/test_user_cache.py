@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from seattle_2025_app import benchmark, user_cache
+from seattle_2025_app.auth import ControllBackend, wsfs_groups
+
+
+def test_get_user_is_cached_with_profile_and_groups(
+    db, user_factory, convention, django_assert_num_queries
+):
+    user = user_factory(with_convention_profile=True)
+    user.groups.add(wsfs_groups(convention)["hugo_nominate"])
+    backend = ControllBackend()
+
+    backend.get_user(user.pk)
+
+    with django_assert_num_queries(0):
+        cached = backend.get_user(user.pk)
+        assert cached == user
+        assert cached.convention_profile.user == cached
+        assert [group.name for group in cached.groups.all()] == [
+            convention.nominating_group
+        ]
+        assert cached.get_session_auth_hash() == user.get_session_auth_hash()
+
+
+def test_no_credentials_are_cached(db, user_factory):
+    user = user_factory()
+    user.set_password("correct horse battery staple")
+    user.save()
+
+    ControllBackend().get_user(user.pk)
+    snapshot = cache.get(user_cache._key(user.pk))
+
+    assert set(snapshot.user) == set(user_cache.USER_FIELDS)
+    assert user.password not in repr(snapshot)
+
+
+def test_user_without_profile_is_cached(db, user_factory, django_assert_num_queries):
+    user = user_factory()
+    backend = ControllBackend()
+
+    backend.get_user(user.pk)
+
+    with django_assert_num_queries(0):
+        cached = backend.get_user(user.pk)
+        assert not hasattr(cached, "convention_profile")
+
+
+def test_cached_user_is_dropped_when_groups_change(db, user_factory, convention):
+    user = user_factory()
+    backend = ControllBackend()
+    backend.get_user(user.pk)
+
+    user.groups.add(wsfs_groups(convention)["hugo_vote"])
+
+    assert [group.name for group in backend.get_user(user.pk).groups.all()] == [
+        convention.voting_group
+    ]
+
+
+def test_cached_user_is_dropped_when_user_or_profile_changes(db, user_factory):
+    user = user_factory(with_convention_profile=True)
+    backend = ControllBackend()
+    backend.get_user(user.pk)
+
+    user.first_name = "Chris"
+    user.save()
+    assert backend.get_user(user.pk).first_name == "Chris"
+
+    user.convention_profile.preferred_name = "Chris R."
+    user.convention_profile.save()
+    assert backend.get_user(user.pk).convention_profile.preferred_name == "Chris R."
+
+
+def test_cached_user_survives_logging_in(
+    db, client, django_capture_on_commit_callbacks
+):
+    token = benchmark.mint_token(
+        4242, None, first_name="Chris", last_name="Rose", email="c@example.com"
+    )
+    client.get("/controll-redirect/", {"r": token})
+    client.logout()
+
+    # a returning member's login caches them, and then saves their last_login
+    with django_capture_on_commit_callbacks(execute=True):
+        client.get("/controll-redirect/", {"r": token})
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/")
+
+    assert response.status_code == 200
+    assert not [q for q in queries if 'FROM "auth_user"' in q["sql"]]
+
+
+def test_deleted_user_is_not_returned(db, user_factory):
+    user = user_factory()
+    backend = ControllBackend()
+    backend.get_user(user.pk)
+
+    user_id = user.pk
+    user.delete()
+
+    assert backend.get_user(user_id) is None
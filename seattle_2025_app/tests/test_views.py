@@ -5,6 +5,8 @@ import jwt
 import pytest
 from django.contrib.auth import get_user, get_user_model
 from django.contrib.auth.models import AbstractUser
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from seattle_2025_app.models import ControllPerson
 
@@ -117,6 +119,38 @@ def test_valid_params_with_new_member(client, make_token, perid):
     assert not get_user(client).is_anonymous
 
 
+@pytest.mark.django_db
+def test_expired_token_with_existing_member(client, make_token, perid):
+    existing_user_payload = dict(**cr_full_token)  # this has a long-past expiry
+    existing_user_payload["perid"] = perid
+    existing_user_payload["newperid"] = None
+
+    controll_user = make_controll_user(perid, None)
+
+    response = client.get(
+        "/controll-redirect/",
+        {"r": make_token(existing_user_payload)},
+    )
+
+    assert response.status_code == 302
+    assert get_user(client) == controll_user.user
+
+
+@pytest.mark.django_db
+def test_expired_token_does_not_create_member(client, make_token, perid):
+    new_user_payload = dict(**cr_full_token)  # this has a long-past expiry
+    new_user_payload["perid"] = perid
+    new_user_payload["newperid"] = None
+
+    response = client.get(
+        "/controll-redirect/",
+        {"r": make_token(new_user_payload)},
+    )
+
+    assert response.status_code == 403
+    assert not ControllPerson.objects.filter(perid=perid).exists()
+
+
 RIGHTS = [
     (
         "hugo_nominate,hugo_vote",
@@ -199,3 +233,14 @@ def test_invalid_token(client, make_token):
     )
 
     assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_invalid_token_opens_no_transaction(client, make_token):
+    token = make_token({}, "not the key")
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/controll-redirect/", {"r": token})
+
+    assert response.status_code == 403
+    assert not any("SAVEPOINT" in query["sql"] for query in queries)
@@ -0,0 +1,186 @@
+"""A cache of the users that `ControllBackend.get_user` hands to each request.
+
+Every page a member views loads their user, and most pages then go on to their
+convention profile and their groups. We keep all three together in Redis, so
+that a member's page views don't have to ask the database who they are.
+
+Only the user fields that requests use are kept (`USER_FIELDS`; anything
+else is loaded from the database if it's asked for), alongside the profile's
+and the (id, name) pairs of their groups. No credentials go into the cache:
+instead of the password hash, we keep the session auth hash that each request
+checks its session against. Entries are dropped when the user, their profile
+or their group memberships change (see `signals`), but not when a login
+records `last_login`, which isn't kept. A group being renamed
+doesn't drop anything; that shows up when the entries expire.
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+import redis
+import sentry_sdk
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AbstractUser, Group
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from nomnom.nominate.models import NominatingMemberProfile
+
+from seattle_2025_app.identity import CacheStats
+
+USER_TIMEOUT = 5 * 60
+
+USER_FIELDS = (
+    "id",
+    "username",
+    "first_name",
+    "last_name",
+    "email",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+)
+
+stats = CacheStats()
+
+
+def depends_on(fields) -> bool:
+    """Whether a cached user goes out of date when these fields change.
+
+    The password isn't cached, but the session auth hash made from it is.
+    """
+    return not set(fields).isdisjoint((*USER_FIELDS, "password"))
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    db: str
+    user: dict[str, Any]
+    session_auth_hash: str
+    profile: dict[str, Any] | None
+    groups: tuple[tuple[int, str], ...]
+
+    @classmethod
+    def from_user(cls, user: AbstractUser) -> "UserSnapshot":
+        try:
+            profile = user.convention_profile  # type: ignore[reportAttributeAccessIssue]
+        except ObjectDoesNotExist:
+            profile = None
+
+        return cls(
+            db=user._state.db or "default",
+            user={name: getattr(user, name) for name in USER_FIELDS},
+            session_auth_hash=user.get_session_auth_hash(),
+            profile=_field_values(profile) if profile is not None else None,
+            groups=tuple((group.pk, group.name) for group in user.groups.all()),
+        )
+
+    def restore(self) -> AbstractUser:
+        """A user just like the one we took the snapshot of.
+
+        Their convention profile and groups come pre-loaded, as if they'd been
+        fetched with select_related and prefetch_related.
+        """
+        UserModel = get_user_model()
+        user = UserModel.from_db(self.db, list(self.user), list(self.user.values()))
+        # the session check would otherwise load the password hash to work this
+        # out again
+        user.get_session_auth_hash = lambda: self.session_auth_hash
+
+        profile = None
+        if self.profile is not None:
+            profile = NominatingMemberProfile.from_db(
+                self.db, list(self.profile), list(self.profile.values())
+            )
+            NominatingMemberProfile.user.field.set_cached_value(profile, user)
+        UserModel.convention_profile.related.set_cached_value(user, profile)
+
+        groups = [
+            Group.from_db(self.db, ["id", "name"], [pk, name])
+            for pk, name in self.groups
+        ]
+        queryset = Group.objects.using(self.db).filter(pk__in=[g.pk for g in groups])
+        queryset._result_cache = groups
+        queryset._prefetch_done = True
+        user._prefetched_objects_cache = {
+            UserModel.groups.field.name: queryset,
+        }
+
+        return user
+
+
+def _field_values(instance) -> dict[str, Any]:
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+    }
+
+
+def _key(user_id) -> str:
+    return f"controll-user:{user_id}"
+
+
+def get(user_id) -> AbstractUser | None:
+    try:
+        snapshot = cache.get(_key(user_id))
+    except redis.RedisError as e:
+        # the cache is an optimisation; never fail a request because of it.
+        sentry_sdk.capture_exception(e)
+        snapshot = None
+
+    return _restored(snapshot)
+
+
+async def aget(user_id) -> AbstractUser | None:
+    """See get()."""
+    try:
+        snapshot = await cache.aget(_key(user_id))
+    except redis.RedisError as e:
+        sentry_sdk.capture_exception(e)
+        snapshot = None
+
+    return _restored(snapshot)
+
+
+def _restored(snapshot: UserSnapshot | None) -> AbstractUser | None:
+    if snapshot is None:
+        stats.miss()
+        return None
+
+    stats.hit()
+    return snapshot.restore()
+
+
+def remember(user: AbstractUser) -> None:
+    try:
+        cache.set(_key(user.pk), UserSnapshot.from_user(user), USER_TIMEOUT)
+    except redis.RedisError as e:
+        sentry_sdk.capture_exception(e)
+
+
+async def aremember(user: AbstractUser) -> None:
+    try:
+        await cache.aset(_key(user.pk), UserSnapshot.from_user(user), USER_TIMEOUT)
+    except redis.RedisError as e:
+        sentry_sdk.capture_exception(e)
+
+
+def forget(*user_ids) -> None:
+    """Drop the users' entries, now and again once the change is committed.
+
+    Dropping them twice keeps a request that reads the user in between the two
+    from putting the old version back.
+    """
+    if not user_ids:
+        return
+
+    keys = [_key(user_id) for user_id in user_ids]
+    _delete(keys)
+    transaction.on_commit(lambda: _delete(keys))
+
+
+def _delete(keys: list[str]) -> None:
+    try:
+        cache.delete_many(keys)
+    except redis.RedisError as e:
+        sentry_sdk.capture_exception(e)
@@ -1,59 +1,108 @@
-import jwt
+import redis
 import sentry_sdk
-from django.conf import settings
-from django.contrib.auth import authenticate, login
-from django.db import transaction
+from asgiref.sync import sync_to_async
+from django.contrib.auth import alogin
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect, render
 
-from .auth import create_member
+from . import metrics, replay
+from .auth import ControllBackend, create_member, decode_token
 
+CONTROLL_BACKEND = "seattle_2025_app.auth.ControllBackend"
 
-@transaction.atomic
-def controll_redirect(request: HttpRequest) -> HttpResponse:
+
+async def controll_redirect(request: HttpRequest) -> HttpResponse:
+    with metrics.measure_login() as measurement:
+        response = await _controll_redirect(request)
+
+    # lets config.sentry keep every failed login, and only some of the others
+    sentry_sdk.set_tag("controll.outcome", measurement.outcome)
+    await sync_to_async(metrics.record, thread_sensitive=False)(measurement)
+    return response
+
+
+async def _controll_redirect(request: HttpRequest) -> HttpResponse:
     # only allow GET methods
     if request.method != "GET":
+        metrics.note_outcome("rejected")
         return HttpResponse(status=405)
 
     token = request.GET.get("r")
 
     if token is None or isinstance(token, list):
-        return render(
-            request,
-            "registration/controll_login_failed.html",
-            context={
-                "reason": "No token or malformed token provided. Please try again."
-            },
-            status=403,
+        return await login_failed(
+            request, "No token or malformed token provided. Please try again."
         )
 
-    user = authenticate(token=token)
+    backend = ControllBackend()
+
+    # A token we've just acted on (a double click, or a mail client prefetching
+    # the link) has nothing left to check; just log them in again.
+    if (replayed := await replay.alookup(token)) is not None and (
+        user := await backend.aget_user(replayed.user_id)
+    ) is not None:
+        await alogin(request, user, backend=CONTROLL_BACKEND)
+        metrics.note_outcome("returning")
+        return redirect("/")
+
+    # The signature is checked exactly once, here; everything after this shares
+    # the verified token.
+    with metrics.timing_jwt():
+        verified_token = decode_token(token)
+    if verified_token is None:
+        return await login_failed(request, "Invalid token. Please try again.")
+
+    # Returning members are let in even if their link has expired. We go to our
+    # backend directly rather than through `aauthenticate`, which would offer
+    # the token to every other backend first, each in its own thread.
+    user = await backend.aauthenticate(request, token=verified_token)
     if user is not None:
-        login(request, user)
+        await alogin(request, user, backend=CONTROLL_BACKEND)
+        await replay.aremember(token, user.pk)
+        metrics.note_outcome("returning")
         return redirect("/")
 
-    # okay, the user couldn't be authenticated directly. Now we check the token
-    # ourselves and see if we can _create_ a member from it.
-    try:
-        payload = jwt.decode(
-            token,
-            settings.CONTROLL_JWT_KEY,
-            algorithms=["HS256", "HS512"],
-        )
-    except jwt.InvalidTokenError as e:
-        sentry_sdk.capture_exception(e)
-
-        return render(
-            request,
-            "registration/controll_login_failed.html",
-            context={"reason": "Invalid token. Please try again."},
-            status=403,
-        )
+    # ...but we only create a member from a link that is still valid.
+    if verified_token.expired:
+        return await login_failed(request, "Invalid token. Please try again.")
 
-    if (member := create_member(request, payload)) is not None:
-        login(request, member.user, backend="seattle_2025_app.auth.ControllBackend")
+    member = await sync_to_async(create_member)(request, verified_token)
+    if member is not None:
+        await alogin(request, member.user, backend=CONTROLL_BACKEND)
+        await replay.aremember(token, member.user.pk)
+        metrics.note_outcome("created")
         return redirect("/")
 
     # TODO: we should probably explain why we're not letting them in
 
+    metrics.note_outcome("rejected")
     return HttpResponse(status=403)
+
+
+async def login_failed(request: HttpRequest, reason: str) -> HttpResponse:
+    metrics.note_outcome("rejected")
+
+    # the site's context processors use the ORM, so this has to render in a
+    # thread.
+    return await sync_to_async(render)(
+        request,
+        "registration/controll_login_failed.html",
+        context={"reason": reason},
+        status=403,
+    )
+
+
+def login_metrics(request: HttpRequest) -> HttpResponse:
+    """The ConTroll login metrics, for Prometheus.
+
+    This is only reachable through the metrics listener on :2020; the public
+    site refuses it (see the Caddyfiles).
+    """
+    try:
+        values = metrics.store().snapshot()
+    except redis.RedisError:
+        return HttpResponse(status=503)
+
+    return HttpResponse(
+        metrics.render(values), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )